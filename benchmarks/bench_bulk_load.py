@@ -0,0 +1,84 @@
+"""Bulk load benchmark | Time and Python heap of list vs float32-array embedding hand-off"""
+
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.vector_search import NumpyCollection
+
+try:
+    import chromadb
+    from chromadb.config import Settings
+    CHROMADB_AVAILABLE = True
+except ImportError:
+    CHROMADB_AVAILABLE = False
+
+
+N_DOCUMENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+DIM = 384  # all-MiniLM-L6-v2
+BATCH = 5_000  # below ChromaDB's max batch size
+PEAK_BATCHES = 5  # batches traced for peak heap (tracemalloc slows allocation)
+
+
+def batches(n: int):
+    """(ids, float32 embeddings) batches standing in for encoder output"""
+    rng = np.random.default_rng(0)
+    for start in range(0, n, BATCH):
+        count = min(BATCH, n - start)
+        ids = [str(i) for i in range(start, start + count)]
+        yield ids, rng.standard_normal((count, DIM), dtype=np.float32)
+
+
+def load(collection, n: int, as_lists: bool) -> float:
+    """Add n documents, returning seconds spent in the hand-off and store"""
+    elapsed = 0.0
+    for ids, embeddings in batches(n):
+        started = time.perf_counter()
+        collection.add(ids=ids, embeddings=embeddings.tolist() if as_lists else embeddings)
+        elapsed += time.perf_counter() - started
+    return elapsed
+
+
+def peak_heap(collection, as_lists: bool) -> int:
+    """Peak Python heap while adding a few batches"""
+    tracemalloc.start()
+    load(collection, BATCH * PEAK_BATCHES, as_lists)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    """Load the same embeddings through .tolist() and as arrays, per backend"""
+    print(f"=== Bulk Load Benchmark ({N_DOCUMENTS:,} x {DIM}, batches of {BATCH:,}) ===\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = [("numpy", lambda name: NumpyCollection(name, Path(tmp) / "numpy"))]
+        if CHROMADB_AVAILABLE:
+            client = chromadb.PersistentClient(
+                path=str(Path(tmp) / "chroma"), settings=Settings(anonymized_telemetry=False)
+            )
+            backends.append(("chroma", lambda name: client.create_collection(name)))
+        else:
+            print("chroma skipped (pip install chromadb)\n")
+
+        for backend, create in backends:
+            for label, as_lists in (("tolist", True), ("float32 array", False)):
+                name = f"{backend}-{label.replace(' ', '-')}"
+                peak = peak_heap(create(f"{name}-peak"), as_lists)
+                seconds = load(create(name), N_DOCUMENTS, as_lists)
+                print(
+                    f"{backend:<7} {label:<14} {seconds:>8.1f}s  "
+                    f"{N_DOCUMENTS / seconds:>9,.0f} docs/s  "
+                    f"peak Python heap/batch {peak / 2**20:>7.1f} MiB"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Quantization benchmark | Memory, recall and latency of float32/float16/int8 scan storage"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bench_vector_backends import DIM, synthetic_embeddings
+from src.vector_search import NumpyCollection
+
+
+N_DOCUMENTS = 200_000
+N_QUERIES = 200
+TOP_K = 10
+
+SETTINGS = [
+    ("float32", None, 1),
+    ("float16", "float16", 1),
+    ("float16 + rescore x4", "float16", 4),
+    ("int8", "int8", 1),
+    ("int8 + rescore x4", "int8", 4),
+]
+
+
+def main():
+    """Build one persistent collection per setting and query it"""
+    print(f"=== Quantization Benchmark ({N_DOCUMENTS:,} x {DIM}, top {TOP_K}) ===\n")
+
+    vectors = synthetic_embeddings(N_DOCUMENTS)
+    queries = synthetic_embeddings(N_QUERIES, seed=1)
+    ids = [str(i) for i in range(N_DOCUMENTS)]
+    truth = None
+    baseline_bytes = None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, quantization, rescore in SETTINGS:
+            collection = NumpyCollection(
+                label.replace(" ", "_").replace("+", ""),
+                Path(tmp),
+                quantization=quantization,
+                rescore=rescore,
+            )
+            for start in range(0, N_DOCUMENTS, 50_000):
+                collection.add(
+                    ids=ids[start:start + 50_000], embeddings=vectors[start:start + 50_000]
+                )
+
+            latencies = []
+            found = []
+            for query in queries:
+                started = time.perf_counter()
+                found.append(collection.query(query[None, :], n_results=TOP_K)["ids"][0])
+                latencies.append(time.perf_counter() - started)
+
+            truth = truth or found
+            baseline_bytes = baseline_bytes or collection.resident_bytes
+            recall = np.mean([len(set(a) & set(b)) / TOP_K for a, b in zip(truth, found)])
+
+            print(
+                f"{label:<22} {collection.resident_bytes / 2**20:>7.1f} MiB "
+                f"({baseline_bytes / collection.resident_bytes:.1f}x less)  "
+                f"p50 {np.median(latencies) * 1e3:>6.2f} ms  recall@{TOP_K} {recall:.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Template rendering benchmark | Compiled renderer vs string.Template.safe_substitute"""
+
+import sys
+import timeit
+from pathlib import Path
+from string import Template
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.prompts import PromptTemplate
+
+
+SHORT = "Summarize the following ${content_type} in ${length} sentences: ${content}"
+
+PARAGRAPH = """Analyze the ${data_type} data focusing on ${focus_area}.
+Context: ${context}. Costs are quoted in $$USD and unknown fields like $unset stay as-is.
+Provide key findings, patterns and recommendations for ${audience}.
+"""
+
+VARIABLES = {
+    "content_type": "article",
+    "length": 3,
+    "content": "Vector databases store embeddings for semantic search.",
+    "data_type": "healthcare",
+    "focus_area": "patient outcomes",
+    "context": "Q3 clinical data from 5 hospitals",
+    "audience": "executives",
+}
+
+
+def bench(label: str, text: str, number: int) -> None:
+    """Time both renderers on one template and check they agree"""
+    baseline = Template(text)
+    compiled = PromptTemplate("bench", text)
+    assert compiled.render(**VARIABLES) == baseline.safe_substitute(**VARIABLES)
+
+    old = timeit.timeit(lambda: baseline.safe_substitute(**VARIABLES), number=number)
+    new = timeit.timeit(lambda: compiled.render(**VARIABLES), number=number)
+
+    print(f"{label:<22} {len(text):>7} chars")
+    print(f"  safe_substitute      {old / number * 1e6:>8.2f} us/render")
+    print(f"  compiled             {new / number * 1e6:>8.2f} us/render  ({old / new:.1f}x)")
+
+
+def main():
+    """Benchmark short and multi-KB templates"""
+    print("=== Template Rendering Benchmark ===\n")
+
+    bench("short", SHORT, number=200_000)
+    bench("multi-KB (4 KB)", PARAGRAPH * 20, number=20_000)
+    bench("multi-KB (32 KB)", PARAGRAPH * 160, number=2_000)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Vector backend benchmark | Recall and latency of NumPy exact/IVF vs ChromaDB HNSW"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.vector_search import NumpyCollection
+
+try:
+    import chromadb
+    from chromadb.config import Settings
+    CHROMADB_AVAILABLE = True
+except ImportError:
+    CHROMADB_AVAILABLE = False
+
+
+N_DOCUMENTS = 50_000
+N_QUERIES = 200
+DIM = 384  # all-MiniLM-L6-v2
+TOP_K = 10
+BATCH = 5_000
+
+
+def synthetic_embeddings(n: int, seed: int = 0) -> np.ndarray:
+    """Unit vectors around topic centres, shaped like sentence embeddings"""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(200, DIM))
+    vectors = centres[rng.integers(0, len(centres), n)] + rng.normal(scale=0.6, size=(n, DIM))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def run(label: str, collection, vectors: np.ndarray, queries: np.ndarray, truth: list) -> list:
+    """Load vectors, then time single queries and measure recall@TOP_K"""
+    ids = [str(i) for i in range(len(vectors))]
+
+    started = time.perf_counter()
+    for start in range(0, len(vectors), BATCH):
+        collection.add(ids=ids[start:start + BATCH], embeddings=vectors[start:start + BATCH])
+    build = time.perf_counter() - started
+
+    collection.query(query_embeddings=queries[:1], n_results=TOP_K)  # train IVF, warm caches
+
+    latencies = []
+    found = []
+    for query in queries:
+        started = time.perf_counter()
+        result = collection.query(query_embeddings=query[None, :], n_results=TOP_K)
+        latencies.append(time.perf_counter() - started)
+        found.append(result["ids"][0])
+
+    recall = np.mean([len(set(a) & set(b)) / TOP_K for a, b in zip(truth or found, found)])
+    print(
+        f"{label:<24} build {build:>6.2f}s  "
+        f"p50 {np.median(latencies) * 1e3:>7.2f} ms  "
+        f"p95 {np.percentile(latencies, 95) * 1e3:>7.2f} ms  recall@{TOP_K} {recall:.3f}"
+    )
+    return found
+
+
+def main():
+    """Compare backends on the same synthetic collection"""
+    print(f"=== Vector Backend Benchmark ({N_DOCUMENTS:,} x {DIM}, {N_QUERIES} queries) ===\n")
+
+    vectors = synthetic_embeddings(N_DOCUMENTS)
+    queries = synthetic_embeddings(N_QUERIES, seed=1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        truth = run("numpy exact", NumpyCollection("exact", Path(tmp)), vectors, queries, [])
+
+        for nprobe in (8, 32):
+            ivf = NumpyCollection("ivf", nlist=256, nprobe=nprobe)
+            run(f"numpy ivf (nprobe={nprobe})", ivf, vectors, queries, truth)
+
+        started = time.perf_counter()
+        reopened = NumpyCollection("exact", Path(tmp))
+        reopened.query(queries[:1], n_results=TOP_K)
+        print(f"{'numpy cold open+query':<24} {time.perf_counter() - started:>11.2f}s")
+
+        if CHROMADB_AVAILABLE:
+            client = chromadb.PersistentClient(
+                path=str(Path(tmp) / "chroma"), settings=Settings(anonymized_telemetry=False)
+            )
+            run("chroma hnsw", client.create_collection("bench"), vectors, queries, truth)
+        else:
+            print("chroma hnsw               skipped (pip install chromadb)")
+
+
+if __name__ == "__main__":
+    main()
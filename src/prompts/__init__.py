@@ -1,6 +1,15 @@
 """Prompt utilities | Template management and archiving"""
 
 from .template_manager import TemplateManager, PromptTemplate
-from .archiving import PromptArchive, ArchivedPrompt
+from .archiving import PromptArchive, ArchivedPrompt, ArchiveSearchResult
+from .retention import RetentionPolicy, RetentionReport
 
-__all__ = ["TemplateManager", "PromptTemplate", "PromptArchive", "ArchivedPrompt"]
+__all__ = [
+    "TemplateManager",
+    "PromptTemplate",
+    "PromptArchive",
+    "ArchivedPrompt",
+    "ArchiveSearchResult",
+    "RetentionPolicy",
+    "RetentionReport",
+]
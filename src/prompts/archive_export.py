@@ -0,0 +1,128 @@
+"""Archive export | Incremental columnar export of archive metadata for analytics"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+import json
+
+from .archive_index import ArchiveIndex
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+COLUMNS = ["timestamp", "target_system", "goal", "quality_score", "bias_risk", "path"]
+
+
+@dataclass
+class ExportResult:
+    """Outcome of one export run"""
+
+    rows: int
+    path: Optional[Path]  # part file written, None when nothing was new
+    format: str
+
+
+class ArchiveExporter:
+    """Append new archive entries to Parquet (pyarrow) or .npy (NumPy) part files"""
+
+    STATE_FILENAME = "_export_state.json"
+
+    def __init__(self, index: ArchiveIndex, export_dir: Path, format: Optional[str] = None):
+        self.index = index
+        self.export_dir = Path(export_dir)
+        self.export_dir.mkdir(parents=True, exist_ok=True)
+        self.state = self._load_state()
+
+        if "format" not in self.state:
+            self.state["format"] = format or ("parquet" if PYARROW_AVAILABLE else "npy")
+        elif format and format != self.state["format"]:
+            raise ValueError(
+                f"Export directory already holds {self.state['format']} parts, not {format}"
+            )
+
+        if self.format == "parquet" and not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow required for Parquet export: pip install pyarrow")
+        if self.format == "npy" and not NUMPY_AVAILABLE:
+            raise ImportError("NumPy required for .npy export: pip install numpy")
+
+    @property
+    def format(self) -> str:
+        """Part file format, fixed for the life of the export directory"""
+        return self.state["format"]
+
+    def export(self) -> ExportResult:
+        """Write entries indexed since the last export to a new part file"""
+        rows = list(self.index.rows_since(self.state.get("last_id", 0)))
+        if not rows:
+            return ExportResult(rows=0, path=None, format=self.format)
+
+        part = self.state.get("parts", 0) + 1
+        columns = {name: [row[i + 1] for row in rows] for i, name in enumerate(COLUMNS)}
+
+        if self.format == "parquet":
+            path = self.export_dir / f"part-{part:05d}.parquet"
+            pq.write_table(pa.table(columns), path)
+        else:
+            path = self.export_dir / f"part-{part:05d}.npy"
+            np.save(path, self._structured_array(columns))
+
+        self.state.update(last_id=rows[-1][0], parts=part)
+        self._save_state()
+
+        return ExportResult(rows=len(rows), path=path, format=self.format)
+
+    def load(self):
+        """Read all part files back as one pyarrow Table or NumPy structured array"""
+        parts = sorted(self.export_dir.glob(f"part-*.{self.format}"))
+
+        if self.format == "parquet":
+            if not parts:
+                return pa.table({
+                    name: pa.array([], pa.float64() if name == "quality_score" else pa.string())
+                    for name in COLUMNS
+                })
+            return pa.concat_tables([pq.read_table(p) for p in parts])
+
+        arrays = [np.load(p, mmap_mode="r") for p in parts]
+        if not arrays:
+            return self._structured_array({name: [] for name in COLUMNS})
+
+        dtype = np.result_type(*[a.dtype for a in arrays])
+        return np.concatenate([a.astype(dtype) for a in arrays])
+
+    def _structured_array(self, columns: dict[str, list]):
+        """Pack columns into a structured array sized to the longest strings"""
+        dtype = [
+            (name, "f8") if name == "quality_score"
+            else (name, f"U{max((len(v) for v in columns[name]), default=1) or 1}")
+            for name in COLUMNS
+        ]
+        array = np.empty(len(columns["path"]), dtype=dtype)
+        for name in COLUMNS:
+            array[name] = columns[name]
+        return array
+
+    def _load_state(self) -> dict:
+        """Read export watermark and format"""
+        state_file = self.export_dir / self.STATE_FILENAME
+        if state_file.exists():
+            return json.loads(state_file.read_text())
+        return {}
+
+    def _save_state(self) -> None:
+        """Persist export watermark after the part file is written"""
+        state_file = self.export_dir / self.STATE_FILENAME
+        tmp_file = state_file.with_suffix(".tmp")
+        tmp_file.write_text(json.dumps(self.state))
+        tmp_file.replace(state_file)
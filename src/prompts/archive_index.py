@@ -0,0 +1,287 @@
+"""Archive index | SQLite FTS5 keyword index and analytics rollups over archived prompts"""
+
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
+import re
+import sqlite3
+import threading
+
+
+class ArchiveIndex:
+    """Incremental BM25 keyword index and per-day rollups stored next to the archive"""
+
+    PASS_THRESHOLD = 7.0
+    GROUP_COLUMNS = ("day", "target_system", "bias_risk")
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS prompts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            path TEXT UNIQUE NOT NULL,
+            timestamp TEXT NOT NULL,
+            target_system TEXT NOT NULL,
+            goal TEXT NOT NULL,
+            quality_score REAL NOT NULL,
+            bias_risk TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS prompts_target ON prompts (target_system, quality_score);
+        CREATE VIRTUAL TABLE IF NOT EXISTS prompts_fts USING fts5 (
+            goal, content, tokenize = 'porter unicode61'
+        );
+        CREATE TABLE IF NOT EXISTS rollups (
+            day TEXT NOT NULL,
+            target_system TEXT NOT NULL,
+            bias_risk TEXT NOT NULL,
+            score_bucket INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            score_sum REAL NOT NULL,
+            passed INTEGER NOT NULL,
+            PRIMARY KEY (day, target_system, bias_risk, score_bucket)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        self._lock = threading.Lock()  # archive may be saved to from several threads
+
+    def add(
+        self,
+        path: str,
+        timestamp: str,
+        target_system: str,
+        goal: str,
+        quality_score: float,
+        bias_risk: str,
+        content: str,
+    ) -> None:
+        """Index one archived prompt, replacing any entry with the same path"""
+        with self._lock, self.conn:
+            self._add(path, timestamp, target_system, goal, quality_score, bias_risk, content)
+
+    def rebuild(self, entries: Iterable[dict]) -> int:
+        """
+        Replace index and rollups with entries (dicts of add() arguments)
+
+        Paths already indexed keep their ids, so id watermarks (e.g. the
+        incremental export) do not see them as new.
+        """
+        count = 0
+
+        with self._lock, self.conn:
+            ids = dict(self.conn.execute("SELECT path, id FROM prompts"))
+            self.conn.execute("DELETE FROM prompts_fts")
+            self.conn.execute("DELETE FROM prompts")
+            self.conn.execute("DELETE FROM rollups")
+
+            for entry in entries:
+                self._add(**entry, row_id=ids.get(entry["path"]))
+                count += 1
+
+        return count
+
+    def move(self, old_path: str, new_path: str) -> None:
+        """Point an indexed prompt at its new location (e.g. inside a bundle)"""
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE prompts SET path = ? WHERE path = ?", (new_path, old_path))
+
+    def remove(self, path: str) -> None:
+        """Drop an archived prompt from the index"""
+        with self._lock, self.conn:
+            self._remove(path)
+
+    def search(
+        self,
+        query: str,
+        target_system: Optional[str] = None,
+        min_score: Optional[float] = None,
+        limit: int = 10,
+    ) -> list[dict]:
+        """BM25-ranked keyword search, all query terms must match"""
+        match = self._match_expression(query)
+        if not match:
+            return []
+
+        sql = (
+            "SELECT p.path, p.timestamp, p.target_system, p.goal, p.quality_score, "
+            "p.bias_risk, bm25(prompts_fts) AS rank, "
+            "snippet(prompts_fts, 1, '[', ']', '...', 12) "
+            "FROM prompts_fts JOIN prompts p ON p.id = prompts_fts.rowid "
+            "WHERE prompts_fts MATCH ?"
+        )
+        params: list = [match]
+
+        if target_system:
+            sql += " AND p.target_system = ?"
+            params.append(target_system)
+        if min_score is not None:
+            sql += " AND p.quality_score >= ?"
+            params.append(min_score)
+
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+
+        columns = [
+            "path", "timestamp", "target_system", "goal", "quality_score", "bias_risk",
+            "score", "snippet",
+        ]
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+
+        hits = []
+        for row in rows:
+            hit = dict(zip(columns, row))
+            hit["score"] = -hit["score"]  # FTS5 bm25() is lower-is-better
+            hits.append(hit)
+
+        return hits
+
+    def stats(
+        self,
+        group_by: Union[str, tuple[str, ...]] = ("day", "target_system"),
+        window: Optional[Union[int, timedelta]] = None,
+    ) -> list[dict]:
+        """
+        Aggregate rollups by day, target_system and/or bias_risk
+
+        window limits rollups to the last N calendar days including today, so
+        window=1 is today only.
+        """
+        if isinstance(group_by, str):
+            group_by = (group_by,)
+
+        unknown = set(group_by) - set(self.GROUP_COLUMNS)
+        if unknown:
+            raise ValueError(f"Cannot group by {sorted(unknown)}, use {self.GROUP_COLUMNS}")
+
+        columns = ", ".join(group_by)
+        select = f"{columns}, " if group_by else ""
+        sql = (
+            f"SELECT {select}bias_risk, score_bucket, SUM(count), SUM(score_sum), SUM(passed) "
+            "FROM rollups"
+        )
+        params: list = []
+
+        if window is not None:
+            days = window if isinstance(window, timedelta) else timedelta(days=window)
+            sql += " WHERE day >= ?"
+            params.append((date.today() - days + timedelta(days=1)).isoformat())
+
+        sql += f" GROUP BY {select}bias_risk, score_bucket"
+
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+
+        groups: dict[tuple, dict] = {}
+        for row in rows:
+            key = tuple(row[: len(group_by)])
+            bias_risk, bucket, count, score_sum, passed = row[len(group_by):]
+
+            group = groups.setdefault(key, {
+                "group": dict(zip(group_by, key)),
+                "count": 0,
+                "score_sum": 0.0,
+                "passed": 0,
+                "bias_risk": {},
+                "histogram": [0] * 11,
+            })
+            group["count"] += count
+            group["score_sum"] += score_sum
+            group["passed"] += passed
+            group["bias_risk"][bias_risk] = group["bias_risk"].get(bias_risk, 0) + count
+            group["histogram"][bucket] += count
+
+        return [groups[key] for key in sorted(groups)]
+
+    def rows_since(self, last_id: int) -> Iterator[tuple]:
+        """Yield (id, timestamp, target_system, goal, quality_score, bias_risk, path) rows"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, timestamp, target_system, goal, quality_score, bias_risk, path "
+                "FROM prompts WHERE id > ? ORDER BY id",
+                (last_id,),
+            ).fetchall()
+        yield from rows
+
+    def count(self) -> int:
+        """Return number of indexed prompts"""
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM prompts").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the underlying database connection"""
+        with self._lock:
+            self.conn.close()
+
+    def _add(
+        self,
+        path: str,
+        timestamp: str,
+        target_system: str,
+        goal: str,
+        quality_score: float,
+        bias_risk: str,
+        content: str,
+        row_id: Optional[int] = None,
+    ) -> None:
+        """Insert rows for one prompt; re-added paths keep their id (caller owns the transaction)"""
+        row_id = self._remove(path) or row_id
+        cursor = self.conn.execute(
+            "INSERT INTO prompts (id, path, timestamp, target_system, goal, quality_score, "
+            "bias_risk) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (row_id, path, timestamp, target_system, goal, quality_score, bias_risk),
+        )
+        self.conn.execute(
+            "INSERT INTO prompts_fts (rowid, goal, content) VALUES (?, ?, ?)",
+            (cursor.lastrowid, goal, content),
+        )
+        self._update_rollup(timestamp, target_system, bias_risk, quality_score, 1)
+
+    def _remove(self, path: str) -> Optional[int]:
+        """Delete index rows for path, returning its id (caller owns the transaction)"""
+        row = self.conn.execute(
+            "SELECT id, timestamp, target_system, bias_risk, quality_score "
+            "FROM prompts WHERE path = ?",
+            (path,),
+        ).fetchone()
+        if row:
+            self.conn.execute("DELETE FROM prompts_fts WHERE rowid = ?", (row[0],))
+            self.conn.execute("DELETE FROM prompts WHERE id = ?", (row[0],))
+            self._update_rollup(*row[1:], delta=-1)
+            return row[0]
+        return None
+
+    def _update_rollup(
+        self,
+        timestamp: str,
+        target_system: str,
+        bias_risk: str,
+        quality_score: float,
+        delta: int,
+    ) -> None:
+        """Add (delta=1) or subtract (delta=-1) one prompt from its rollup bucket"""
+        bucket = min(max(int(quality_score), 0), 10)
+        passed = delta if quality_score >= self.PASS_THRESHOLD else 0
+        key = (timestamp[:10], target_system, bias_risk, bucket)
+
+        self.conn.execute(
+            "INSERT INTO rollups VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (day, target_system, bias_risk, score_bucket) DO UPDATE SET "
+            "count = count + excluded.count, score_sum = score_sum + excluded.score_sum, "
+            "passed = passed + excluded.passed",
+            (*key, delta, delta * quality_score, passed),
+        )
+        if delta < 0:
+            self.conn.execute(
+                "DELETE FROM rollups WHERE day = ? AND target_system = ? AND bias_risk = ? "
+                "AND score_bucket = ? AND count <= 0",
+                key,
+            )
+
+    def _match_expression(self, query: str) -> str:
+        """Quote query terms so user input never hits FTS5 query syntax"""
+        terms = re.findall(r"\w+", query)
+        return " ".join(f'"{term}"' for term in terms)
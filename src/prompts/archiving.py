@@ -1,10 +1,15 @@
 """Prompt archiving | Store prompts with metadata and evaluation results"""
 
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional, Union
 import re
+import zipfile
+
+from .archive_export import ArchiveExporter, ExportResult
+from .archive_index import ArchiveIndex
+from .retention import ArchiveRetention, RetentionPolicy, RetentionReport
 
 
 @dataclass
@@ -17,14 +22,49 @@ class ArchivedPrompt:
     goal: str
     quality_score: float
     bias_risk: str
+    template_version: str = ""  # "name@version" of the template used, if recorded
+
+
+@dataclass
+class ArchiveSearchResult:
+    """Keyword search hit with BM25 score and matching snippet"""
+
+    prompt: ArchivedPrompt
+    score: float
+    snippet: str
+
+
+@dataclass
+class ArchiveStats:
+    """Aggregated archive metrics for one group"""
+
+    group: dict[str, str]
+    count: int
+    mean_score: float
+    pass_rate: float
+    bias_risk: dict[str, int]
+    histogram: list[int]  # prompt counts per whole quality score, 0-10
 
 
 class PromptArchive:
     """Archive prompts with evaluation metadata"""
 
+    INDEX_FILENAME = ".index.sqlite3"
+    BUNDLE_DIRNAME = "bundles"
+    METADATA_ALIASES = {"generated": "timestamp", "target": "target_system"}
+    BODY_SEPARATOR = "\n\n---\n\n"
+
     def __init__(self, archive_dir: Optional[Path] = None):
         self.archive_dir = Path(archive_dir) if archive_dir else Path("./archive/prompts")
         self.archive_dir.mkdir(parents=True, exist_ok=True)
+        self.bundle_dir = self.archive_dir / self.BUNDLE_DIRNAME
+        self.index = ArchiveIndex(self.archive_dir / self.INDEX_FILENAME)
+
+        if not self.index.count() and (
+            any(self.archive_dir.glob("*.md")) or any(self.bundle_dir.glob("*.zip"))
+        ):
+            # archive written before the index existed, or index file deleted
+            self.rebuild_index()
 
     def save(
         self,
@@ -36,8 +76,9 @@ class PromptArchive:
         bias_risk: str = "unknown",
         strengths: Optional[list[str]] = None,
         issues: Optional[list[str]] = None,
+        template_version: Optional[str] = None,
     ) -> ArchivedPrompt:
-        """Save prompt with metadata"""
+        """Save prompt with metadata (template_version: PromptTemplate.ref it was rendered from)"""
         timestamp = datetime.now()
         filename = self._generate_filename(timestamp, target_system, goal)
         filepath = self.archive_dir / filename
@@ -51,11 +92,22 @@ class PromptArchive:
             bias_risk=bias_risk,
             strengths=strengths or [],
             issues=issues or [],
+            template_version=template_version,
         )
 
-        content = f"{metadata}\n\n---\n\n{prompt_content}"
+        content = f"{metadata}{self.BODY_SEPARATOR}{prompt_content}"
         filepath.write_text(content)
 
+        self.index.add(
+            path=str(filepath),
+            timestamp=timestamp.isoformat(),
+            target_system=target_system,
+            goal=goal,
+            quality_score=quality_score,
+            bias_risk=bias_risk,
+            content=prompt_content,
+        )
+
         return ArchivedPrompt(
             filepath=filepath,
             timestamp=timestamp.isoformat(),
@@ -63,15 +115,15 @@ class PromptArchive:
             goal=goal,
             quality_score=quality_score,
             bias_risk=bias_risk,
+            template_version=template_version or "",
         )
 
     def list_archived(self, target_system: Optional[str] = None) -> list[ArchivedPrompt]:
-        """List archived prompts, optionally filtered by target system"""
+        """List archived prompts (hot files and bundles), optionally filtered by system"""
         archived = []
 
-        for filepath in self.archive_dir.glob("*.md"):
+        for filepath, content in self._iter_archived():
             try:
-                content = filepath.read_text()
                 metadata = self._parse_metadata(content)
 
                 if target_system and metadata.get("target_system") != target_system:
@@ -83,8 +135,9 @@ class PromptArchive:
                         timestamp=metadata.get("timestamp", ""),
                         target_system=metadata.get("target_system", ""),
                         goal=metadata.get("goal", ""),
-                        quality_score=float(metadata.get("quality_score", 0)),
+                        quality_score=self._parse_score(metadata.get("quality_score", "0")),
                         bias_risk=metadata.get("bias_risk", "unknown"),
+                        template_version=metadata.get("template_version", ""),
                     )
                 )
             except Exception:
@@ -92,6 +145,119 @@ class PromptArchive:
 
         return sorted(archived, key=lambda x: x.timestamp, reverse=True)
 
+    def search(
+        self,
+        query: str,
+        target_system: Optional[str] = None,
+        min_score: Optional[float] = None,
+        limit: int = 10,
+    ) -> list[ArchiveSearchResult]:
+        """Keyword search over archived prompts, best BM25 match first"""
+        hits = self.index.search(
+            query, target_system=target_system, min_score=min_score, limit=limit
+        )
+
+        return [
+            ArchiveSearchResult(
+                prompt=ArchivedPrompt(
+                    filepath=Path(hit["path"]),
+                    timestamp=hit["timestamp"],
+                    target_system=hit["target_system"],
+                    goal=hit["goal"],
+                    quality_score=hit["quality_score"],
+                    bias_risk=hit["bias_risk"],
+                ),
+                score=hit["score"],
+                snippet=hit["snippet"],
+            )
+            for hit in hits
+        ]
+
+    def stats(
+        self,
+        group_by: Union[str, tuple[str, ...]] = ("day", "target_system"),
+        window: Optional[Union[int, timedelta]] = None,
+    ) -> list[ArchiveStats]:
+        """
+        Quality and bias metrics from incrementally maintained rollups
+
+        Args:
+            group_by: Any of "day", "target_system", "bias_risk"
+            window: Only include the last N days, today included (int or timedelta)
+        """
+        return [
+            ArchiveStats(
+                group=row["group"],
+                count=row["count"],
+                mean_score=row["score_sum"] / row["count"] if row["count"] else 0.0,
+                pass_rate=row["passed"] / row["count"] if row["count"] else 0.0,
+                bias_risk=row["bias_risk"],
+                histogram=row["histogram"],
+            )
+            for row in self.index.stats(group_by=group_by, window=window)
+        ]
+
+    def rebuild_index(self) -> int:
+        """Rebuild search index and rollups from archived files"""
+        return self.index.rebuild(self._scan_entries())
+
+    def read(self, filepath: Path) -> str:
+        """Read an archived prompt file, including prompts packed into bundles"""
+        filepath = Path(filepath)
+        if filepath.parent.suffix == ".zip":
+            with zipfile.ZipFile(filepath.parent) as zf:
+                return zf.read(filepath.name).decode("utf-8")
+        return filepath.read_text()
+
+    def apply_retention(
+        self,
+        policy: Optional[RetentionPolicy] = None,
+        dry_run: bool = True,
+        now: Optional[datetime] = None,
+    ) -> RetentionReport:
+        """
+        Compact old prompts into monthly bundles and drop expired ones
+
+        Defaults to a dry run that only reports the files and bytes reclaimed.
+        """
+        return ArchiveRetention(self).run(policy or RetentionPolicy(), dry_run=dry_run, now=now)
+
+    def export_metadata(self, export_dir: Path, format: Optional[str] = None) -> ExportResult:
+        """Append metadata of prompts archived since the last export to a columnar file"""
+        return ArchiveExporter(self.index, export_dir, format=format).export()
+
+    def _iter_archived(self) -> Iterator[tuple[Path, str]]:
+        """Yield (filepath, content) for hot files, then bundled prompts"""
+        for filepath in self.archive_dir.glob("*.md"):
+            try:
+                yield filepath, filepath.read_text()
+            except OSError:
+                continue
+
+        for bundle in sorted(self.bundle_dir.glob("*.zip")):
+            try:
+                with zipfile.ZipFile(bundle) as zf:
+                    for name in zf.namelist():
+                        yield bundle / name, zf.read(name).decode("utf-8")
+            except (OSError, zipfile.BadZipFile):
+                continue
+
+    def _scan_entries(self) -> Iterator[dict]:
+        """Parse every archived prompt into index entries"""
+        for filepath, content in self._iter_archived():
+            metadata = self._parse_metadata(content)
+            _, _, body = content.partition(self.BODY_SEPARATOR)
+
+            yield {
+                "path": str(filepath),
+                "timestamp": metadata.get("timestamp", ""),
+                "target_system": metadata.get("target_system", ""),
+                "goal": metadata.get("goal", ""),
+                "quality_score": self._parse_score(metadata.get("quality_score", "0")),
+                "bias_risk": metadata.get("bias_risk", "unknown"),
+                "content": body,
+            }
+
     def _generate_filename(self, timestamp: datetime, target_system: str, goal: str) -> str:
         """Generate safe filename for archived prompt"""
         ts_str = timestamp.strftime("%Y%m%d_%H%M%S")
@@ -114,6 +280,7 @@ class PromptArchive:
         bias_risk: str,
         strengths: list[str],
         issues: list[str],
+        template_version: Optional[str] = None,
     ) -> str:
         """Build metadata header for archived prompt"""
         lines = [
@@ -127,6 +294,9 @@ class PromptArchive:
         if context:
             lines.append(f"**Context:** {context}")
 
+        if template_version:
+            lines.append(f"**Template Version:** {template_version}")
+
         lines.extend([
             "",
             "## Evaluation",
@@ -152,14 +322,19 @@ class PromptArchive:
     def _parse_metadata(self, content: str) -> dict:
         """Extract metadata from archived prompt"""
         metadata = {}
-        lines = content.split("\n")
+        header = content.split(self.BODY_SEPARATOR, 1)[0]
 
-        for line in lines:
-            if line.startswith("**") and ":**" in line:
-                key_val = line.strip("*").split(":", 1)
-                if len(key_val) == 2:
-                    key = key_val[0].strip().lower().replace(" ", "_")
-                    value = key_val[1].strip()
-                    metadata[key] = value
+        for line in header.split("\n"):
+            match = re.match(r"^\*\*(.+?):\*\*\s*(.*)$", line)
+            if match:
+                key = match.group(1).strip().lower().replace(" ", "_")
+                metadata[self.METADATA_ALIASES.get(key, key)] = match.group(2).strip()
 
         return metadata
+
+    def _parse_score(self, value: str) -> float:
+        """Parse "8.5/10" style quality scores"""
+        try:
+            return float(value.split("/", 1)[0])
+        except ValueError:
+            return 0.0
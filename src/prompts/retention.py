@@ -0,0 +1,157 @@
+"""Archive retention | Tiered compaction and expiry of archived prompts"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+import zipfile
+import zlib
+
+
+@dataclass
+class RetentionPolicy:
+    """Retention tiers for archived prompts"""
+
+    hot_days: int = 30  # newer prompts stay as individual files
+    horizon_days: Optional[int] = 365  # older prompts are dropped unless kept by a rule
+    min_quality_score: Optional[float] = None  # past horizon keep only scores >= this
+
+    def keep_past_horizon(self, quality_score: float) -> bool:
+        """Whether a prompt older than the horizon survives"""
+        return self.min_quality_score is not None and quality_score >= self.min_quality_score
+
+
+@dataclass
+class RetentionReport:
+    """Files and bytes a retention run moved or reclaimed"""
+
+    dry_run: bool
+    files_compacted: int = 0
+    files_dropped: int = 0
+    bytes_compacted: int = 0  # uncompressed size of files packed into bundles
+    bytes_reclaimed: int = 0  # disk space freed by compression and drops
+    bundles: list[str] = field(default_factory=list)
+
+
+class ArchiveRetention:
+    """Apply a RetentionPolicy to a PromptArchive's hot files and bundles"""
+
+    def __init__(self, archive):
+        self.archive = archive
+
+    def run(
+        self, policy: RetentionPolicy, dry_run: bool = True, now: Optional[datetime] = None
+    ) -> RetentionReport:
+        """Compact files past hot_days into monthly bundles, drop expired prompts"""
+        now = now or datetime.now()
+        hot_cutoff = now - timedelta(days=policy.hot_days)
+        horizon = now - timedelta(days=policy.horizon_days) if policy.horizon_days else None
+
+        report = RetentionReport(dry_run=dry_run)
+        to_bundle: dict[Path, list[Path]] = {}
+
+        for filepath in sorted(self.archive.archive_dir.glob("*.md")):
+            archived_at = self._archived_at(filepath)
+            if archived_at >= hot_cutoff:
+                continue
+
+            data = filepath.read_bytes()
+
+            if horizon and archived_at < horizon and not self._keep(policy, data):
+                report.files_dropped += 1
+                report.bytes_reclaimed += len(data)
+                if not dry_run:
+                    filepath.unlink()
+                    self.archive.index.remove(str(filepath))
+                continue
+
+            bundle = self.archive.bundle_dir / f"{archived_at:%Y-%m}.zip"
+            to_bundle.setdefault(bundle, []).append(filepath)
+            report.files_compacted += 1
+            report.bytes_compacted += len(data)
+            if dry_run:
+                report.bytes_reclaimed += len(data) - len(zlib.compress(data))
+
+        for bundle, files in to_bundle.items():
+            report.bundles.append(bundle.name)
+            if not dry_run:
+                report.bytes_reclaimed += self._pack(bundle, files)
+
+        if horizon:
+            for bundle in sorted(self.archive.bundle_dir.glob("*.zip")):
+                self._expire_bundle(bundle, policy, horizon, dry_run, report)
+
+        return report
+
+    def _pack(self, bundle: Path, files: list[Path]) -> int:
+        """Append files to a bundle, then delete originals; returns bytes saved"""
+        bundle.parent.mkdir(parents=True, exist_ok=True)
+        saved = 0
+
+        with zipfile.ZipFile(bundle, "a", compression=zipfile.ZIP_DEFLATED) as zf:
+            existing = set(zf.namelist())
+            for filepath in files:
+                if filepath.name not in existing:
+                    zf.write(filepath, arcname=filepath.name)
+                info = zf.getinfo(filepath.name)
+                saved += info.file_size - info.compress_size
+
+        for filepath in files:
+            filepath.unlink()
+            self.archive.index.move(str(filepath), str(bundle / filepath.name))
+
+        return saved
+
+    def _expire_bundle(
+        self,
+        bundle: Path,
+        policy: RetentionPolicy,
+        horizon: datetime,
+        dry_run: bool,
+        report: RetentionReport,
+    ) -> None:
+        """Drop bundle members past the horizon, rewriting the bundle if needed"""
+        with zipfile.ZipFile(bundle) as zf:
+            expired = [
+                info for info in zf.infolist()
+                if self._archived_at(Path(info.filename), bundle) < horizon
+                and not self._keep(policy, zf.read(info))
+            ]
+            if not expired:
+                return
+
+            report.files_dropped += len(expired)
+            report.bytes_reclaimed += sum(info.compress_size for info in expired)
+            if dry_run:
+                return
+
+            dropped = {info.filename for info in expired}
+            remaining = [info for info in zf.infolist() if info.filename not in dropped]
+
+            tmp_bundle = bundle.with_suffix(".tmp")
+            if remaining:
+                with zipfile.ZipFile(tmp_bundle, "w", compression=zipfile.ZIP_DEFLATED) as out:
+                    for info in remaining:
+                        out.writestr(info, zf.read(info))
+
+        if remaining:
+            tmp_bundle.replace(bundle)
+        else:
+            bundle.unlink()
+
+        for name in dropped:
+            self.archive.index.remove(str(bundle / name))
+
+    def _keep(self, policy: RetentionPolicy, data: bytes) -> bool:
+        """Evaluate keep rules against a prompt's metadata header"""
+        metadata = self.archive._parse_metadata(data.decode("utf-8", errors="replace"))
+        return policy.keep_past_horizon(
+            self.archive._parse_score(metadata.get("quality_score", "0"))
+        )
+
+    def _archived_at(self, filepath: Path, bundle: Optional[Path] = None) -> datetime:
+        """Archive time from the YYYYMMDD_HHMMSS filename prefix, mtime as fallback"""
+        try:
+            return datetime.strptime(filepath.name[:15], "%Y%m%d_%H%M%S")
+        except ValueError:
+            return datetime.fromtimestamp((bundle or filepath).stat().st_mtime)
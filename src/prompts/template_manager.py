@@ -1,9 +1,16 @@
 """Prompt templates | Template management with variable substitution"""
 
+from collections import OrderedDict
+from itertools import islice
 from pathlib import Path
 from string import Template
-from typing import Optional
+from typing import IO, Iterable, Iterator, Mapping, Optional, Sequence, Union
 from datetime import datetime
+import hashlib
+import json
+import multiprocessing
+import re
+import time
 
 
 class PromptTemplate:
@@ -14,46 +21,262 @@ class PromptTemplate:
         self.template = Template(template_text)
         self.description = description
         self.created_at = datetime.now()
+        self._segments, self._slots = self._compile(self.template)
+        self.variables = frozenset(name for _, name in self._slots)
+        self.has_directives = "{%" in template_text
+        self.version = hashlib.sha256(self.serialize().encode()).hexdigest()[:12]
+
+    @property
+    def ref(self) -> str:
+        """Pinned reference "name@version" for recording which version was used"""
+        return f"{self.name}@{self.version}"
+
+    def serialize(self) -> str:
+        """On-disk form: optional "# description" line followed by template text"""
+        header = f"# {self.description}\n" if self.description else ""
+        return header + self.template.template
 
     def render(self, **variables) -> str:
-        """Render template with variables"""
-        return self.template.safe_substitute(**variables)
+        """Render template with variables (unknown placeholders are left intact)"""
+        return self.render_mapping(variables)
+
+    def render_mapping(self, variables: Mapping[str, object]) -> str:
+        """Render from a mapping, same semantics as Template.safe_substitute"""
+        parts = self._segments.copy()
+        for index, name in self._slots:
+            if name in variables:
+                parts[index] = str(variables[name])
+        return "".join(parts)
+
+    def render_strict(self, **variables) -> str:
+        """Render template, raising ValueError if any variable is missing"""
+        missing = self.missing_variables(variables)
+        if missing:
+            raise ValueError(
+                f"Template '{self.name}' missing variables: {', '.join(missing)}"
+            )
+        return self.render_mapping(variables)
+
+    def missing_variables(self, variables: Mapping[str, object]) -> list[str]:
+        """Template variables not provided in mapping"""
+        return sorted(name for name in self.variables if name not in variables)
 
     def get_variables(self) -> list[str]:
-        """Extract variable names from template"""
-        import re
+        """Variable names in template (computed once at construction)"""
+        return list(self.variables)
+
+    @staticmethod
+    def _compile(template: Template) -> tuple[list[str], list[tuple[int, str]]]:
+        """
+        Split template text into literal segments and placeholder slots
 
-        pattern = r"\$\{?([a-zA-Z_][a-zA-Z0-9_]*)\}?"
-        return list(set(re.findall(pattern, self.template.template)))
+        Slot segments hold the original placeholder text, so a render only
+        overwrites the slots it has values for and joins the list.
+        """
+        text = template.template
+        segments: list[str] = []
+        slots: list[tuple[int, str]] = []
+        literal: list[str] = []
+        position = 0
+
+        for match in template.pattern.finditer(text):
+            literal.append(text[position:match.start()])
+            name = match.group("named") or match.group("braced")
+
+            if name is not None:
+                segments.append("".join(literal))
+                literal = []
+                slots.append((len(segments), name))
+                segments.append(match.group())
+            elif match.group("escaped") is not None:
+                literal.append(template.delimiter)
+            else:
+                literal.append(match.group())
+
+            position = match.end()
+
+        literal.append(text[position:])
+        segments.append("".join(literal))
+        return segments, slots
 
 
 class TemplateManager:
-    """Manage prompt templates and versioning"""
+    """
+    Manage prompt templates and versioning
+
+    Templates can be composed from others:
+        {% include safety_block %}          inline another template
+        {% extends base %}                  first line, then override the base's blocks
+        {% block name %}...{% endblock %}   overridable section (not nestable)
+
+    Composed templates are flattened once and cached; changing a template
+    recompiles only the templates that depend on it.
 
-    def __init__(self, templates_dir: Optional[Path] = None):
+    Immutable versions are recorded on the write path: add_template() stores
+    the template and the flattened versions of it and its dependents, and
+    warm_up()/save_snapshot() store every template on disk. Reads never write,
+    so a ref of a file edited outside the manager resolves once one of those
+    has run. Flattened versions are kept apart from source versions in the
+    manifest; get_template() resolves both, list_versions() lists sources.
+    """
+
+    VERSIONS_DIRNAME = ".versions"
+    INCLUDE_PATTERN = re.compile(r"\{%\s*include\s+[\"']?([\w./-]+)[\"']?\s*%\}")
+    EXTENDS_PATTERN = re.compile(r"^\s*\{%\s*extends\s+[\"']?([\w./-]+)[\"']?\s*%\}")
+    BLOCK_PATTERN = re.compile(r"\{%\s*block\s+(\w+)\s*%\}(.*?)\{%\s*endblock\s*%\}", re.S)
+
+    def __init__(
+        self,
+        templates_dir: Optional[Path] = None,
+        reload_interval: Optional[float] = 0.0,
+        version_cache_size: int = 128,
+        preload: bool = False,
+        snapshot: Optional[Path] = None,
+    ):
+        """
+        Args:
+            templates_dir: Directory of <name>.txt templates
+            reload_interval: Seconds between mtime/size checks of cached template files
+                (0 checks on every lookup, None never reloads once loaded)
+            version_cache_size: Pinned template versions kept parsed in memory
+            preload: Scan templates_dir and compile every template at startup
+            snapshot: Snapshot file (see save_snapshot) to load instead of reading each file
+        """
         self.templates_dir = Path(templates_dir) if templates_dir else Path("templates")
         self.templates_dir.mkdir(parents=True, exist_ok=True)
+        self.versions_dir = self.templates_dir / self.VERSIONS_DIRNAME
         self.templates: dict[str, PromptTemplate] = {}
+        self.reload_interval = reload_interval
+        self.version_cache_size = version_cache_size
+        self._file_cache: dict[str, tuple[int, int, float, PromptTemplate]] = {}
+        self._manifests: dict[str, dict] = {}
+        self._version_cache: OrderedDict[tuple[str, str], PromptTemplate] = OrderedDict()
+        self._compiled: dict[str, tuple[PromptTemplate, PromptTemplate]] = {}
+        self._dependencies: dict[str, set[str]] = {}
+        self._dependents: dict[str, set[str]] = {}
+        self._index: Optional[set[str]] = None
+
+        if snapshot and Path(snapshot).exists():
+            self.load_snapshot(snapshot)
+        if preload:
+            self.warm_up()
+
+    def list_templates(self, refresh: bool = False) -> list[str]:
+        """Names of all known templates, from one cached scan of templates_dir"""
+        if self._index is None or refresh:
+            self._index = {
+                path.relative_to(self.templates_dir).with_suffix("").as_posix()
+                for path in self.templates_dir.rglob("*.txt")
+                if self.VERSIONS_DIRNAME not in path.relative_to(self.templates_dir).parts
+            }
+        return sorted(self._index | set(self.templates))
+
+    def warm_up(self, load_bodies: bool = True) -> int:
+        """
+        Index templates_dir and compile every template ahead of the first request
+
+        Args:
+            load_bodies: Read, compile and record versions of all templates (False
+                only builds the name index; bodies then load lazily on first use)
+
+        Returns:
+            Number of templates available, for readiness checks
+        """
+        names = self.list_templates(refresh=True)
+        if load_bodies:
+            for name in names:
+                if self._record_versions(name) is None:
+                    raise ValueError(f"Template '{name}' disappeared during warm up")
+        return len(names)
+
+    def save_snapshot(self, snapshot: Path) -> int:
+        """Write all templates_dir templates with their mtime/size to one JSON file"""
+        entries = {}
+        for name in self.list_templates(refresh=True):
+            template_file = self.templates_dir / f"{name}.txt"
+            if not template_file.exists():
+                continue
+            stat = template_file.stat()
+            self._record_versions(name)
+            template = self._get_cached_file(name)
+            entries[name] = {
+                "text": template.template.template,
+                "description": template.description,
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+            }
+
+        tmp_file = Path(snapshot).with_suffix(".tmp")
+        tmp_file.write_text(json.dumps({"templates": entries}))
+        tmp_file.replace(snapshot)
+        return len(entries)
+
+    def load_snapshot(self, snapshot: Path) -> int:
+        """Prime the file cache from a snapshot; entries revalidate by mtime/size"""
+        entries = json.loads(Path(snapshot).read_text())["templates"]
+        now = time.monotonic()
+
+        for name, entry in entries.items():
+            template = PromptTemplate(name, entry["text"], entry["description"])
+            self._file_cache[name] = (entry["mtime_ns"], entry["size"], now, template)
+
+        self._index = set(entries)
+        return len(entries)
 
     def add_template(
         self, name: str, template_text: str, description: str = ""
     ) -> PromptTemplate:
-        """Add new template"""
+        """Add new template (raises ValueError on include cycles or missing includes)"""
         template = PromptTemplate(name, template_text, description)
+        previous = self.templates.get(name)
         self.templates[name] = template
+        self._invalidate(name)
+
+        if template.has_directives:
+            try:
+                self._compose(name, template)
+            except ValueError:
+                if previous:
+                    self.templates[name] = previous
+                else:
+                    del self.templates[name]
+                raise
+
         self._save_template(template)
+        for key in [name, *sorted(self._dependents.get(name, ()))]:
+            if "@" not in key:  # pinned compositions never change
+                self._record_versions(key)
+
+        if self._index is not None:
+            self._index.add(name)
         return template
 
-    def get_template(self, name: str) -> Optional[PromptTemplate]:
-        """Retrieve template by name"""
-        if name in self.templates:
-            return self.templates[name]
+    def get_template(
+        self, name: str, version: Optional[str] = None
+    ) -> Optional[PromptTemplate]:
+        """Retrieve template by name, or a pinned version ("name@version" also accepted)"""
+        if version is None and "@" in name:
+            name, version = name.split("@", 1)
 
-        template_file = self.templates_dir / f"{name}.txt"
-        if template_file.exists():
-            return self._load_template(template_file)
+        if version is not None:
+            key = f"{name}@{version}"
+            source = self._get_version(name, version)
+        else:
+            key = name
+            source = self._get_source(name)
+
+        if source is None or not source.has_directives:
+            return source
+
+        return self._compose(key, source)
 
-        return None
+    def dependents(self, name: str) -> set[str]:
+        """Compiled templates that include or extend name, directly or transitively"""
+        return set(self._dependents.get(name, ()))
+
+    def list_versions(self, name: str) -> list[str]:
+        """Saved source versions of a template, oldest first (not flattened ones)"""
+        return list(self._manifest(name)["versions"])
 
     def render_template(self, name: str, **variables) -> str:
         """Load and render template with variables"""
@@ -63,14 +286,221 @@ class TemplateManager:
 
         return template.render(**variables)
 
+    def render_many(
+        self,
+        name: str,
+        rows: Union[Iterable[Mapping[str, object]], Mapping[str, Sequence]],
+        out: Optional[Union[Path, str, IO[str]]] = None,
+        separator: str = "\n",
+        processes: Optional[int] = None,
+        chunksize: int = 1024,
+    ) -> Union[Iterator[str], int]:
+        """
+        Render one template against many rows of variables
+
+        Args:
+            name: Template name
+            rows: Iterable of variable dicts, or a column mapping {variable: values}
+            out: File path or text stream to write to instead of yielding
+            separator: Written after each rendered prompt when out is given
+            processes: Worker processes for very large jobs (None renders in-process)
+            chunksize: Rows per worker task and per write
+
+        Returns:
+            Lazy iterator of rendered prompts, or number of rows written if out is given
+        """
+        template = self.get_template(name)
+        if not template:
+            raise ValueError(f"Template '{name}' not found")
+
+        if isinstance(rows, Mapping):
+            columns = list(rows)
+            rows = (dict(zip(columns, values)) for values in zip(*rows.values()))
+
+        rendered = _render_rows(template, rows, processes, chunksize)
+        if out is None:
+            return rendered
+
+        if isinstance(out, (str, Path)):
+            with open(out, "w") as stream:
+                return _write_rendered(rendered, stream, separator, chunksize)
+        return _write_rendered(rendered, out, separator, chunksize)
+
+    def _get_source(self, name: str) -> Optional[PromptTemplate]:
+        """Uncomposed template as added or stored on disk"""
+        if name in self.templates:
+            return self.templates[name]
+        return self._get_cached_file(name)
+
+    def _compose(self, key: str, source: PromptTemplate) -> PromptTemplate:
+        """Flattened template for key, recompiled only when it or a dependency changed"""
+        if self.reload_interval is not None:
+            for dependency in self._dependencies.get(key, ()):
+                self._get_source(dependency)  # invalidates key if the file changed
+
+        compiled = self._compiled.get(key)
+        if compiled and compiled[0] is source:
+            return compiled[1]
+
+        dependencies: set[str] = set()
+        text = self._resolve(source, [source.name], dependencies)
+        text = self.BLOCK_PATTERN.sub(lambda m: m.group(2), text)
+        template = PromptTemplate(source.name, text, source.description)
+
+        for dependency in self._dependencies.get(key, ()):
+            self._dependents[dependency].discard(key)
+        for dependency in dependencies:
+            self._dependents.setdefault(dependency, set()).add(key)
+        self._dependencies[key] = dependencies
+        self._compiled[key] = (source, template)
+
+        return template
+
+    def _resolve(self, source: PromptTemplate, stack: list[str], dependencies: set[str]) -> str:
+        """Inline includes and apply extends, keeping block markers for later overrides"""
+
+        def load(name: str) -> PromptTemplate:
+            if name in stack:
+                raise ValueError(f"Template include cycle: {' -> '.join(stack + [name])}")
+            dependency = self._get_source(name)
+            if dependency is None:
+                raise ValueError(f"Template '{name}' included by '{stack[-1]}' not found")
+            dependencies.add(name)
+            return dependency
+
+        def include(match: re.Match) -> str:
+            name = match.group(1)
+            return self._resolve(load(name), stack + [name], dependencies)
+
+        text = self.INCLUDE_PATTERN.sub(include, source.template.template)
+
+        extends = self.EXTENDS_PATTERN.match(text)
+        if not extends:
+            return text
+
+        base_name = extends.group(1)
+        base = self._resolve(load(base_name), stack + [base_name], dependencies)
+        overrides = dict(self.BLOCK_PATTERN.findall(text))
+
+        def override(match: re.Match) -> str:
+            body = overrides.get(match.group(1), match.group(2))
+            return f"{{% block {match.group(1)} %}}{body}{{% endblock %}}"
+
+        return self.BLOCK_PATTERN.sub(override, base)
+
+    def _invalidate(self, name: str) -> None:
+        """Drop compiled templates built from name"""
+        self._compiled.pop(name, None)
+        for key in self._dependents.get(name, ()):
+            self._compiled.pop(key, None)
+
+    def _get_cached_file(self, name: str) -> Optional[PromptTemplate]:
+        """Load template from disk, reusing the parsed copy while mtime/size match"""
+        cached = self._file_cache.get(name)
+        now = time.monotonic()
+
+        if cached and (
+            self.reload_interval is None or now - cached[2] < self.reload_interval
+        ):
+            return cached[3]
+
+        template_file = self.templates_dir / f"{name}.txt"
+        try:
+            stat = template_file.stat()
+        except FileNotFoundError:
+            if self._file_cache.pop(name, None):
+                self._invalidate(name)
+            return None
+
+        if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            template = cached[3]
+        else:
+            template = self._load_template(template_file, name=name)
+            if cached:
+                self._invalidate(name)
+
+        self._file_cache[name] = (stat.st_mtime_ns, stat.st_size, now, template)
+        return template
+
+    def _get_version(self, name: str, version: str) -> Optional[PromptTemplate]:
+        """Look up an immutable version via the manifest, keeping hot versions parsed"""
+        key = (name, version)
+        if key in self._version_cache:
+            self._version_cache.move_to_end(key)
+            return self._version_cache[key]
+
+        if not self._has_version(self._manifest(name), version):
+            if not self._has_version(self._manifest(name, reload=True), version):
+                return None
+
+        template = self._load_template(self.versions_dir / name / f"{version}.txt", name=name)
+
+        self._version_cache[key] = template
+        if len(self._version_cache) > self.version_cache_size:
+            self._version_cache.popitem(last=False)
+
+        return template
+
+    def _manifest(self, name: str, reload: bool = False) -> dict:
+        """
+        Per-name manifest, cached until reload
+
+        {"versions": {version: created_at}, "composed": {version: created_at}},
+        source versions and flattened compositions respectively.
+        """
+        if reload or name not in self._manifests:
+            manifest_file = self.versions_dir / name / "manifest.json"
+            if manifest_file.exists():
+                manifest = json.loads(manifest_file.read_text())
+            else:
+                manifest = {"versions": {}}
+            manifest.setdefault("composed", {})
+            self._manifests[name] = manifest
+        return self._manifests[name]
+
+    @staticmethod
+    def _has_version(manifest: dict, version: str) -> bool:
+        """Whether version is a recorded source or flattened version"""
+        return version in manifest["versions"] or version in manifest["composed"]
+
     def _save_template(self, template: PromptTemplate) -> None:
-        """Save template to disk"""
+        """Save template to disk as latest <name>.txt plus an immutable version"""
         template_file = self.templates_dir / f"{template.name}.txt"
-        with template_file.open("w") as f:
-            f.write(f"# {template.description}\n" if template.description else "")
-            f.write(template.template.template)
+        template_file.write_text(template.serialize())
+        self._record_version(template)
+
+    def _record_versions(self, name: str) -> Optional[PromptTemplate]:
+        """Record the current source and flattened versions of name, returning the latter"""
+        source = self._get_source(name)
+        if source is None:
+            return None
+        self._record_version(source)
+        if not source.has_directives:
+            return source
+
+        template = self._compose(name, source)
+        self._record_version(template, composed=True)
+        return template
+
+    def _record_version(self, template: PromptTemplate, composed: bool = False) -> None:
+        """Store template as an immutable version of its name unless already stored"""
+        field = "composed" if composed else "versions"
+        if template.version in self._manifest(template.name)[field]:
+            return
+        manifest = self._manifest(template.name, reload=True)  # other writers' versions
+        if template.version in manifest[field]:
+            return
+
+        version_dir = self.versions_dir / template.name
+        version_dir.mkdir(parents=True, exist_ok=True)
+        (version_dir / f"{template.version}.txt").write_text(template.serialize())
+
+        manifest[field][template.version] = template.created_at.isoformat()
+        tmp_file = version_dir / "manifest.json.tmp"
+        tmp_file.write_text(json.dumps(manifest, indent=2))
+        tmp_file.replace(version_dir / "manifest.json")
 
-    def _load_template(self, template_file: Path) -> PromptTemplate:
+    def _load_template(self, template_file: Path, name: Optional[str] = None) -> PromptTemplate:
         """Load template from disk"""
         with template_file.open() as f:
             lines = f.readlines()
@@ -82,5 +512,46 @@ class TemplateManager:
         else:
             template_text = "".join(lines)
 
-        name = template_file.stem
-        return PromptTemplate(name, template_text, description)
+        return PromptTemplate(name or template_file.stem, template_text, description)
+
+
+_worker_template: Optional[PromptTemplate] = None
+
+
+def _init_render_worker(template: PromptTemplate) -> None:
+    """Hold the template once per worker process"""
+    global _worker_template
+    _worker_template = template
+
+
+def _render_in_worker(variables: Mapping[str, object]) -> str:
+    """Render one row in a worker process"""
+    return _worker_template.render_mapping(variables)
+
+
+def _render_rows(
+    template: PromptTemplate,
+    rows: Iterable[Mapping[str, object]],
+    processes: Optional[int],
+    chunksize: int,
+) -> Iterator[str]:
+    """Render rows lazily, in order, in-process or across a process pool"""
+    if not processes or processes <= 1:
+        yield from map(template.render_mapping, rows)
+        return
+
+    with multiprocessing.Pool(
+        processes, initializer=_init_render_worker, initargs=(template,)
+    ) as pool:
+        yield from pool.imap(_render_in_worker, rows, chunksize=chunksize)
+
+
+def _write_rendered(
+    rendered: Iterator[str], stream: IO[str], separator: str, chunksize: int
+) -> int:
+    """Write rendered prompts in chunks, returning the row count"""
+    count = 0
+    while batch := list(islice(rendered, chunksize)):
+        stream.write(separator.join(batch) + separator)
+        count += len(batch)
+    return count
@@ -1,9 +1,10 @@
 """Vector search utilities | ChromaDB semantic search with full workflows"""
 
 from .chromadb_client import VectorSearch
+from .numpy_index import NumpyCollection
 
 try:
     from .semantic_engine import SemanticSearchEngine
-    __all__ = ["VectorSearch", "SemanticSearchEngine"]
+    __all__ = ["VectorSearch", "NumpyCollection", "SemanticSearchEngine"]
 except ImportError:
-    __all__ = ["VectorSearch"]
+    __all__ = ["VectorSearch", "NumpyCollection"]
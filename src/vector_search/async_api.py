@@ -0,0 +1,221 @@
+"""Async API | asyncio wrappers with a bounded executor and micro-batched search"""
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Optional
+import asyncio
+import json
+
+from .chromadb_client import VectorSearch
+
+if TYPE_CHECKING:
+    from .semantic_engine import SemanticSearchEngine
+
+
+class _Offloaded:
+    """Runs blocking calls on a bounded thread pool without blocking the event loop"""
+
+    def __init__(self, max_workers: int):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="async-search"
+        )
+
+    async def _run(self, function: Callable, *args, **kwargs):
+        """
+        Await function(*args, **kwargs) on the executor
+
+        Cancelling the awaiting task drops the call if it has not started yet; a
+        call already running finishes in its thread and its result is discarded.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(function, *args, **kwargs))
+
+    async def close(self) -> None:
+        """Wait for running calls and stop the executor"""
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+class _Batch:
+    """Vector searches sharing top_k and where, waiting to be flushed together"""
+
+    def __init__(self, top_k: int, where: Optional[dict]):
+        self.top_k = top_k
+        self.where = where
+        self.queries: list[str] = []
+        self.waiters: list[asyncio.Future] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class AsyncVectorSearch(_Offloaded):
+    """
+    asyncio front end for a VectorSearch
+
+    Vector-mode searches with the same top_k and where that arrive within
+    batch_window seconds are answered by one search_many() call, i.e. one
+    encode pass and one collection query. Cached results return without
+    touching the executor, and every batched result is stored in the
+    VectorSearch result cache. Other calls run one per executor slot.
+    """
+
+    def __init__(
+        self,
+        search: VectorSearch,
+        max_workers: int = 4,
+        batch_window: float = 0.002,
+        max_batch_size: int = 64,
+    ):
+        """
+        Args:
+            search: VectorSearch to serve
+            max_workers: Threads running encode/query/write calls concurrently
+            batch_window: Seconds the first search of a batch waits for others
+            max_batch_size: Queries that flush a batch before its window ends
+        """
+        super().__init__(max_workers)
+        self.vector_search = search
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self._pending: dict[tuple, _Batch] = {}
+        self._flushing: set[asyncio.Task] = set()
+
+    async def search(
+        self, query: str, top_k: int = 5, where: Optional[dict] = None, mode: str = "vector"
+    ) -> dict[str, list]:
+        """Async VectorSearch.search; concurrent vector searches are micro-batched"""
+        if mode != "vector":
+            return await self._run(self.vector_search.search, query, top_k, where, mode)
+
+        cached = self.vector_search.result_cache.get(
+            self.vector_search._result_key(query, top_k, where, mode)
+        )
+        if cached is not None:
+            return cached
+
+        loop = asyncio.get_running_loop()
+        key = (top_k, json.dumps(where, sort_keys=True, default=str))
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = _Batch(top_k, where)
+            batch.timer = loop.call_later(self.batch_window, self._flush, key)
+
+        waiter = loop.create_future()
+        batch.queries.append(query)
+        batch.waiters.append(waiter)
+        if len(batch.queries) >= self.max_batch_size:
+            self._flush(key)
+
+        return await waiter
+
+    async def search_many(
+        self, queries: list[str], top_k: int = 5, where: Optional[dict] = None
+    ) -> dict[str, list]:
+        """Async VectorSearch.search_many"""
+        return await self._run(self.vector_search.search_many, queries, top_k, where)
+
+    async def add_documents(
+        self, documents: list[str], ids: list[str], metadatas: Optional[list[dict]] = None
+    ) -> None:
+        """Async VectorSearch.add_documents"""
+        await self._run(self.vector_search.add_documents, documents, ids, metadatas)
+
+    async def close(self) -> None:
+        """Flush waiting searches, wait for running batches and stop the executor"""
+        for key in list(self._pending):
+            self._flush(key)
+        if self._flushing:
+            await asyncio.gather(*self._flushing, return_exceptions=True)
+        await super().close()
+
+    def _flush(self, key: tuple) -> None:
+        """Start the pending batch for key, leaving out cancelled searches"""
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        batch.timer.cancel()
+
+        live = [i for i, waiter in enumerate(batch.waiters) if not waiter.cancelled()]
+        if not live:
+            return
+        batch.queries = [batch.queries[i] for i in live]
+        batch.waiters = [batch.waiters[i] for i in live]
+
+        task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+        self._flushing.add(task)
+        task.add_done_callback(self._flushing.discard)
+
+    async def _run_batch(self, batch: _Batch) -> None:
+        """One search_many() for the batch, fanned back out to its waiters and the cache"""
+        cache = self.vector_search.result_cache
+        generation = cache.generation
+        call = asyncio.ensure_future(
+            self._run(self.vector_search.search_many, batch.queries, batch.top_k, batch.where)
+        )
+
+        def drop_if_abandoned(_):
+            if all(waiter.cancelled() for waiter in batch.waiters):
+                call.cancel()
+
+        for waiter in batch.waiters:
+            waiter.add_done_callback(drop_if_abandoned)
+
+        try:
+            results = await call
+        except asyncio.CancelledError:
+            return
+        except Exception as error:
+            for waiter in batch.waiters:
+                if not waiter.done():
+                    waiter.set_exception(error)
+            return
+
+        for i, (query, waiter) in enumerate(zip(batch.queries, batch.waiters)):
+            result = _select(results, i)
+            cache.put(
+                self.vector_search._result_key(query, batch.top_k, batch.where, "vector"),
+                result,
+                generation,
+            )
+            if not waiter.done():
+                waiter.set_result(result)
+
+
+class AsyncSemanticSearchEngine(_Offloaded):
+    """asyncio front end for a SemanticSearchEngine, one call per executor slot"""
+
+    def __init__(self, engine: "SemanticSearchEngine", max_workers: int = 4):
+        """
+        Args:
+            engine: SemanticSearchEngine to serve
+            max_workers: Threads running searches and indexing concurrently
+        """
+        super().__init__(max_workers)
+        self.engine = engine
+
+    async def search_similar(
+        self,
+        query: str,
+        n_results: int = 5,
+        filter_system: Optional[str] = None,
+        mode: str = "vector",
+    ) -> list[dict]:
+        """Async SemanticSearchEngine.search_similar"""
+        return await self._run(self.engine.search_similar, query, n_results, filter_system, mode)
+
+    async def index_directory(self, directory: Path, **kwargs) -> int:
+        """Async SemanticSearchEngine.index_directory"""
+        return await self._run(self.engine.index_directory, directory, **kwargs)
+
+
+def _select(results: dict, index: int) -> dict:
+    """Single-query result for query index of a batched collection query"""
+    return {
+        key: value if key == "included" or value is None else [value[index]]
+        for key, value in results.items()
+    }
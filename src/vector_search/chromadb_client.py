@@ -1,64 +1,403 @@
 """ChromaDB utilities | Vector database client for semantic search"""
 
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import Optional
-import chromadb
-from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
+from typing import Iterable, Optional, Sequence
+import json
+import threading
+import numpy as np
+
+from .embedders import get_embedder
+from .embedding_cache import EmbeddingCache
+from .lexical import LexicalIndex, reciprocal_rank_fusion
+from .numpy_index import NumpyCollection
+from .query_cache import CacheStats, QueryResultCache
+
+try:
+    import chromadb
+    from chromadb.config import Settings
+    CHROMADB_AVAILABLE = True
+except ImportError:
+    CHROMADB_AVAILABLE = False
+
+
+def _chroma_accepts_arrays() -> bool:
+    """Whether this ChromaDB validates NumPy rows as embeddings (older releases need lists)"""
+    try:
+        from chromadb.api.types import validate_embeddings
+        validate_embeddings([np.zeros(1, dtype=np.float32)])
+        return True
+    except (ImportError, ValueError):
+        return False
+
+
+CHROMA_ACCEPTS_ARRAYS = CHROMADB_AVAILABLE and _chroma_accepts_arrays()
+
+BACKENDS = ("chroma", "numpy")
+SEARCH_MODES = ("vector", "lexical", "hybrid")
 
 
 class VectorSearch:
-    """ChromaDB client for semantic search operations"""
+    """Semantic search over a ChromaDB or in-process NumPy collection"""
 
     def __init__(
         self,
         collection_name: str,
         persist_directory: str = ".chromadb",
         embedding_model: str = "all-MiniLM-L6-v2",
+        embedding_cache_dir: Optional[str] = None,
+        query_cache_size: int = 1024,
+        backend: str = "chroma",
+        backend_options: Optional[dict] = None,
+        lexical: bool = False,
+        device: Optional[str] = None,
+        result_cache_size: int = 0,
+        result_cache_ttl: Optional[float] = 300.0,
     ):
+        """
+        Args:
+            collection_name: ChromaDB collection
+            persist_directory: ChromaDB storage path (NumPy backend: its numpy/ subdirectory)
+            embedding_model: sentence-transformers model name, loaded on first encode
+                and shared by every collection in the process (see embedders)
+            embedding_cache_dir: Reuse document embeddings across runs and collections
+                (see EmbeddingCache); None always encodes
+            query_cache_size: Query embeddings kept in an in-memory LRU (0 disables)
+            backend: "chroma" or "numpy" (NumpyCollection, no ChromaDB needed)
+            backend_options: NumpyCollection options, e.g. {"nlist": 256, "nprobe": 16}
+            lexical: Also keep a BM25 keyword index, for search(mode="hybrid")
+            device: Model device ("cpu", "cuda", ...); None lets the model choose
+            result_cache_size: search() results cached until the next write through a
+                VectorSearch or SemanticSearchEngine on this collection (0 disables;
+                writes made directly on .collection are only seen after result_cache_ttl)
+            result_cache_ttl: Seconds a cached result stays valid (None: no expiry)
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}. Available: {', '.join(BACKENDS)}")
+        if backend == "chroma" and not CHROMADB_AVAILABLE:
+            raise ImportError("ChromaDB required for the chroma backend: pip install chromadb")
+
         self.collection_name = collection_name
         self.persist_dir = Path(persist_directory)
         self.embedding_model = embedding_model
+        self.backend = backend
 
-        self.client = chromadb.PersistentClient(
-            path=str(self.persist_dir),
-            settings=Settings(anonymized_telemetry=False),
+        self.embedder = get_embedder(embedding_model, device)
+        self.embedding_cache = (
+            EmbeddingCache(Path(embedding_cache_dir), embedding_model)
+            if embedding_cache_dir
+            else None
         )
 
-        self.embedder = SentenceTransformer(embedding_model)
-        self.collection = self.client.get_or_create_collection(
-            name=collection_name,
-            metadata={"embedding_model": embedding_model},
+        if backend == "numpy":
+            self.client = None
+            self.max_batch_size: Optional[int] = None
+            self.accepts_arrays = True
+            self.collection = NumpyCollection(
+                collection_name,
+                self.persist_dir / "numpy",
+                metadata={"embedding_model": embedding_model},
+                **(backend_options or {}),
+            )
+        else:
+            self.client = chromadb.PersistentClient(
+                path=str(self.persist_dir),
+                settings=Settings(anonymized_telemetry=False),
+            )
+            self.collection = self.client.get_or_create_collection(
+                name=collection_name,
+                metadata={"embedding_model": embedding_model},
+            )
+            self.max_batch_size = self.client.get_max_batch_size()
+            self.accepts_arrays = CHROMA_ACCEPTS_ARRAYS
+
+        self.lexical: Optional[LexicalIndex] = None
+        if lexical:
+            self.persist_dir.mkdir(parents=True, exist_ok=True)
+            self.lexical = LexicalIndex(self.persist_dir / f"{collection_name}.lexical.sqlite3")
+            self._retrievers = ThreadPoolExecutor(max_workers=2, thread_name_prefix="retriever")
+
+        self.result_cache = QueryResultCache(
+            result_cache_size,
+            result_cache_ttl,
+            scope=(str(self.persist_dir.resolve()), collection_name),
         )
 
+        self.query_cache_size = query_cache_size
+        self._query_cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+
     def add_documents(
         self, documents: list[str], ids: list[str], metadatas: Optional[list[dict]] = None
     ) -> None:
         """Add documents to vector database with embeddings"""
-        embeddings = self.embedder.encode(documents, show_progress_bar=True).tolist()
+        embeddings = self._embed(documents)
 
-        self.collection.add(
-            documents=documents, embeddings=embeddings, ids=ids, metadatas=metadatas
-        )
+        self._store(self.collection.add, ids, documents, embeddings, metadatas)
+        if self.lexical:
+            self.lexical.add(ids, documents, metadatas)
+        self.result_cache.bump()
+
+    def ingest(
+        self,
+        documents: Iterable[Sequence],
+        batch_size: int = 256,
+        checkpoint: Optional[str] = None,
+    ) -> int:
+        """
+        Stream (id, document) or (id, document, metadata) items into the collection
+
+        Documents are encoded in fixed-size batches while the previous batch is
+        written, so at most two batches are held in memory. Writes are upserts, and
+        with a checkpoint file a rerun over the same iterable resumes after the
+        last committed batch.
+
+        Returns:
+            Number of documents written by this call
+        """
+        committed = self._read_checkpoint(checkpoint)
+        items = iter(documents)
+        for _ in islice(items, committed):
+            pass
+
+        written = 0
+        pending: Optional[Future] = None
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest") as writer:
+            while batch := list(islice(items, batch_size)):
+                ids = [str(item[0]) for item in batch]
+                docs = [item[1] for item in batch]
+                metadatas = [item[2] if len(item) > 2 else None for item in batch]
+                embeddings = self._embed(docs)
+
+                if pending:
+                    pending.result()
+
+                committed += len(batch)
+                written += len(batch)
+                pending = writer.submit(
+                    self._write_batch,
+                    ids,
+                    docs,
+                    embeddings,
+                    metadatas if any(metadatas) else None,
+                    checkpoint,
+                    committed,
+                )
+
+            if pending:
+                pending.result()
+
+        return written
 
     def search(
-        self, query: str, top_k: int = 5, where: Optional[dict] = None
+        self, query: str, top_k: int = 5, where: Optional[dict] = None, mode: str = "vector"
+    ) -> dict[str, list]:
+        """
+        Semantic search for similar documents
+
+        mode="hybrid" (needs lexical=True) runs the vector query and a BM25 keyword
+        search concurrently and merges them with reciprocal-rank fusion; "lexical"
+        runs the keyword search alone. Those modes add bm25_scores and scores (fused,
+        or BM25 for lexical) to the result; distances or bm25_scores are None for
+        documents a retriever missed. Results are cached per (query, top_k, where,
+        mode) until the next write.
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown mode: {mode}. Available: {', '.join(SEARCH_MODES)}")
+
+        cache_key = self._result_key(query, top_k, where, mode)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        generation = self.result_cache.generation
+
+        if mode != "vector":
+            results = self._keyword_search(query, top_k, where, mode)
+        else:
+            query_embeddings = self._encode_queries([query])
+            results = self.collection.query(
+                query_embeddings=self._payload(query_embeddings),
+                n_results=top_k,
+                where=where,
+            )
+
+        self.result_cache.put(cache_key, results, generation)
+        return results
+
+    def search_many(
+        self, queries: list[str], top_k: int = 5, where: Optional[dict] = None
     ) -> dict[str, list]:
-        """Semantic search for similar documents"""
-        query_embedding = self.embedder.encode([query])[0].tolist()
+        """Semantic search for several queries with one encode pass and one ChromaDB query"""
+        if not queries:
+            return {"ids": [], "documents": [], "metadatas": [], "distances": []}
 
-        results = self.collection.query(
-            query_embeddings=[query_embedding],
+        query_embeddings = self._encode_queries(queries)
+
+        return self.collection.query(
+            query_embeddings=self._payload(query_embeddings),
             n_results=top_k,
             where=where,
         )
 
-        return results
-
     def count(self) -> int:
         """Return number of documents in collection"""
         return self.collection.count()
 
+    def cache_stats(self) -> CacheStats:
+        """Result cache hit/miss/eviction counters and current generation"""
+        return self.result_cache.stats()
+
     def delete_collection(self) -> None:
         """Delete collection and all embeddings"""
-        self.client.delete_collection(self.collection_name)
+        if self.client is None:
+            self.collection.drop()
+        else:
+            self.client.delete_collection(self.collection_name)
+
+        if self.lexical:
+            self.lexical.close()
+            self.lexical.db_path.unlink(missing_ok=True)
+            self.lexical = None
+        self.result_cache.bump()
+
+    def _result_key(self, query: str, top_k: int, where: Optional[dict], mode: str) -> tuple:
+        """Result cache key for one search() call"""
+        return (query, top_k, json.dumps(where, sort_keys=True, default=str), mode)
+
+    def _write_batch(
+        self,
+        ids: list[str],
+        documents: list[str],
+        embeddings: np.ndarray,
+        metadatas: Optional[list[Optional[dict]]],
+        checkpoint: Optional[str],
+        committed: int,
+    ) -> None:
+        """Upsert one ingest batch, then advance the checkpoint"""
+        self._store(self.collection.upsert, ids, documents, embeddings, metadatas)
+        if self.lexical:
+            self.lexical.upsert(ids, documents, metadatas)
+        self.result_cache.bump()
+
+        if checkpoint:
+            tmp_file = Path(f"{checkpoint}.tmp")
+            tmp_file.write_text(json.dumps({"committed": committed}))
+            tmp_file.replace(checkpoint)
+
+    def _store(
+        self,
+        write,
+        ids: list[str],
+        documents: list[str],
+        embeddings: np.ndarray,
+        metadatas: Optional[list[Optional[dict]]],
+    ) -> None:
+        """
+        Pass float32 embeddings to collection.add/upsert in max-batch slices
+
+        Slices are views of the encoder's array; only a store that rejects arrays
+        gets lists, built one slice at a time.
+        """
+        step = self.max_batch_size or len(ids) or 1
+        for start in range(0, len(ids), step):
+            end = start + step
+            write(
+                ids=ids[start:end],
+                documents=documents[start:end],
+                embeddings=self._payload(embeddings[start:end]),
+                metadatas=metadatas[start:end] if metadatas else None,
+            )
+
+    def _payload(self, embeddings: np.ndarray):
+        """Embeddings in a form the collection accepts"""
+        return embeddings if self.accepts_arrays else embeddings.tolist()
+
+    def _keyword_search(
+        self, query: str, top_k: int, where: Optional[dict], mode: str
+    ) -> dict[str, list]:
+        """BM25 or hybrid search in the ChromaDB result layout, plus per-retriever scores"""
+        if self.lexical is None:
+            raise ValueError(f"mode={mode!r} needs VectorSearch(lexical=True)")
+
+        vector_hits: list[dict] = []
+        if mode == "hybrid":
+            vector = self._retrievers.submit(self._vector_hits, query, top_k * 2, where)
+            lexical = self._retrievers.submit(self.lexical.search, query, top_k * 2, where)
+            vector_hits, lexical_hits = vector.result(), lexical.result()
+            ranking = reciprocal_rank_fusion(
+                [[hit["id"] for hit in vector_hits], [hit["id"] for hit in lexical_hits]]
+            )[:top_k]
+        else:
+            lexical_hits = self.lexical.search(query, top_k, where)
+            ranking = [(hit["id"], hit["score"]) for hit in lexical_hits]
+
+        hits = {hit["id"]: hit for hit in vector_hits}
+        for hit in lexical_hits:
+            hits.setdefault(hit["id"], {**hit, "distance": None})["bm25"] = hit["score"]
+
+        ids = [doc_id for doc_id, _ in ranking]
+        return {
+            "ids": [ids],
+            "documents": [[hits[doc_id]["document"] for doc_id in ids]],
+            "metadatas": [[hits[doc_id]["metadata"] for doc_id in ids]],
+            "distances": [[hits[doc_id]["distance"] for doc_id in ids]],
+            "bm25_scores": [[hits[doc_id].get("bm25") for doc_id in ids]],
+            "scores": [[score for _, score in ranking]],
+        }
+
+    def _vector_hits(self, query: str, top_k: int, where: Optional[dict]) -> list[dict]:
+        """Vector search results as dicts with id, document, metadata and distance"""
+        results = self.search(query, top_k=top_k, where=where)
+        return [
+            {"id": doc_id, "document": document, "metadata": metadata, "distance": distance}
+            for doc_id, document, metadata, distance in zip(
+                results["ids"][0],
+                results["documents"][0],
+                results["metadatas"][0],
+                results["distances"][0],
+            )
+        ]
+
+    def _read_checkpoint(self, checkpoint: Optional[str]) -> int:
+        """Documents committed by a previous ingest run"""
+        if checkpoint and Path(checkpoint).exists():
+            return json.loads(Path(checkpoint).read_text())["committed"]
+        return 0
+
+    def _embed(self, documents: list[str]) -> np.ndarray:
+        """Encode documents, through the embedding cache when configured"""
+        if self.embedding_cache is None:
+            return self._encode(documents)
+        return self.embedding_cache.encode(documents, self._encode)
+
+    def _encode_queries(self, queries: list[str]) -> np.ndarray:
+        """Encode queries, serving repeats from the LRU and batching the misses"""
+        with self._query_cache_lock:
+            cached = {}
+            for query in queries:
+                if query in self._query_cache:
+                    self._query_cache.move_to_end(query)
+                    cached[query] = self._query_cache[query]
+
+        misses = list(dict.fromkeys(q for q in queries if q not in cached))
+        if misses:
+            vectors = np.asarray(self.embedder.encode(misses), dtype=np.float32)
+            cached.update(zip(misses, vectors))
+
+            with self._query_cache_lock:
+                for query, vector in zip(misses, vectors):
+                    self._query_cache[query] = vector
+                while len(self._query_cache) > self.query_cache_size:
+                    self._query_cache.popitem(last=False)
+
+        return np.stack([cached[query] for query in queries])
+
+    def _encode(self, documents: list[str]) -> np.ndarray:
+        """Run the embedding model"""
+        return np.asarray(
+            self.embedder.encode(documents, show_progress_bar=True),
+            dtype=np.float32,
+        )
@@ -0,0 +1,125 @@
+"""Document chunking | Markdown-aware splitting for chunk-level embedding"""
+
+from dataclasses import dataclass
+import re
+
+
+HEADING = re.compile(r"^#{1,6}\s+(.*)$")
+
+
+@dataclass
+class Chunk:
+    """Contiguous piece of a document"""
+
+    index: int
+    text: str
+    heading: str  # nearest Markdown heading above the chunk, "" before the first
+    start: int  # character offset in the source text
+
+
+def chunk_markdown(text: str, chunk_size: int = 1000, chunk_overlap: int = 200) -> list[Chunk]:
+    """
+    Split Markdown into chunks of at most chunk_size characters
+
+    Headings always start a new chunk and paragraphs are kept whole when they
+    fit. Consecutive chunks within one section share up to chunk_overlap
+    trailing characters, cut at a word boundary. Oversized paragraphs are
+    split at whitespace.
+    """
+    if chunk_overlap >= chunk_size:
+        raise ValueError("chunk_overlap must be smaller than chunk_size")
+
+    chunks: list[Chunk] = []
+    heading = ""
+    body = ""  # text of the chunk being built
+    body_start = 0
+    heading_only = False  # body is just the section's heading line
+
+    def emit() -> str:
+        """Close the current chunk; returns the overlap to carry into the next one"""
+        if body.strip():
+            chunks.append(Chunk(len(chunks), body.strip(), heading, body_start))
+            return _tail(chunks[-1].text, chunk_overlap)
+        return ""
+
+    for start, block in _blocks(text):
+        match = HEADING.match(block)
+        if match:
+            emit()
+            heading = match.group(1).strip()
+            body, body_start, heading_only = block, start, True
+            continue
+
+        if len(body) + 2 + len(block) <= chunk_size or not body and len(block) <= chunk_size:
+            if not body:
+                body_start = start
+            body = f"{body}\n\n{block}" if body else block
+            heading_only = False
+            continue
+
+        if body and not heading_only and len(block) <= chunk_size:
+            overlap = emit()
+            if len(overlap) + 2 + len(block) > chunk_size:
+                overlap = ""
+            body = f"{overlap}\n\n{block}" if overlap else block
+            body_start = start - (len(overlap) + 2 if overlap else 0)
+            continue
+
+        # oversized paragraph (or one that cannot share a chunk with its heading):
+        # fill the current chunk word by word, continuing split pieces with a space
+        separator = "\n\n" if body else ""
+        for offset, word in _words(block, chunk_size):
+            if body and len(body) + len(separator) + len(word) > chunk_size:
+                overlap = emit()
+                if len(overlap) + 1 + len(word) > chunk_size:
+                    overlap = ""
+                body = overlap
+                body_start = start + offset - (len(overlap) + 1 if overlap else 0)
+                separator = " " if overlap else ""
+            if not body:
+                body_start = start + offset
+            body = f"{body}{separator}{word}"
+            separator = " "
+        heading_only = False
+
+    emit()
+    return chunks
+
+
+def _blocks(text: str) -> list[tuple[int, str]]:
+    """Paragraphs and heading lines with their character offsets"""
+    blocks = []
+    for match in re.finditer(r"[^\n]+(?:\n(?!\s*\n)(?!#{1,6}\s)[^\n]+)*", text):
+        block = match.group().strip()
+        if not block:
+            continue
+        lines = block.split("\n")
+        if HEADING.match(lines[0]) and len(lines) > 1:
+            blocks.append((match.start(), lines[0]))
+            blocks.append((match.start() + len(lines[0]) + 1, "\n".join(lines[1:])))
+        else:
+            blocks.append((match.start(), block))
+    return blocks
+
+
+def _words(block: str, chunk_size: int) -> list[tuple[int, str]]:
+    """Whitespace-separated words with their offsets, words over chunk_size cut up"""
+    words = []
+    for match in re.finditer(r"\S+", block):
+        word = match.group()
+        for cut in range(0, len(word), chunk_size):
+            words.append((match.start() + cut, word[cut:cut + chunk_size]))
+    return words
+
+
+def _tail(text: str, length: int) -> str:
+    """Last up-to-length characters of text, starting at a word boundary"""
+    if length <= 0 or not text:
+        return ""
+    if len(text) <= length:
+        return text
+    tail = text[-length:]
+    if text[-length - 1].isspace():
+        return tail.strip()
+    space = re.search(r"\s", tail)
+    return tail[space.end():].strip() if space else ""
@@ -0,0 +1,136 @@
+"""Embedding models | Lazy process-wide registry sharing one model per (name, device)"""
+
+from typing import Callable, Optional
+import threading
+
+import numpy as np
+
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+try:
+    from chromadb.api.types import EmbeddingFunction
+    CHROMADB_AVAILABLE = True
+except ImportError:
+    EmbeddingFunction = object
+    CHROMADB_AVAILABLE = False
+
+
+_models: dict[tuple[str, Optional[str]], object] = {}
+_factories: dict[str, Callable[[str, Optional[str]], object]] = {}
+_lock = threading.Lock()
+
+
+class SharedEmbedder:
+    """Handle to a registry model; the model loads on first encode"""
+
+    def __init__(self, model_name: str, device: Optional[str] = None):
+        self.model_name = model_name
+        self.device = device
+
+    @property
+    def model(self):
+        """The shared model instance, loading it if needed"""
+        return _load(self.model_name, self.device)
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the model is currently held by the registry"""
+        return (self.model_name, self.device) in _models
+
+    def encode(self, sentences, **kwargs):
+        """Encode with the shared model (SentenceTransformer.encode arguments)"""
+        return self.model.encode(sentences, **kwargs)
+
+
+class RegistryEmbeddingFunction(EmbeddingFunction):
+    """ChromaDB embedding function encoding through the shared model registry"""
+
+    def __init__(self, model_name: str, device: Optional[str] = None):
+        self.embedder = get_embedder(model_name, device)
+
+    def __call__(self, input: list[str]) -> list[np.ndarray]:
+        vectors = self.embedder.encode(list(input), show_progress_bar=False)
+        return list(np.asarray(vectors, dtype=np.float32))
+
+    @staticmethod
+    def name() -> str:
+        return "vector_search_registry"
+
+    def get_config(self) -> dict:
+        return {"model_name": self.embedder.model_name, "device": self.embedder.device}
+
+    @staticmethod
+    def build_from_config(config: dict) -> "RegistryEmbeddingFunction":
+        return RegistryEmbeddingFunction(config["model_name"], config.get("device"))
+
+
+def get_embedder(model_name: str, device: Optional[str] = None) -> SharedEmbedder:
+    """Lazy handle to the process-wide model for (model_name, device)"""
+    return SharedEmbedder(model_name, device)
+
+
+def warmup(model_name: str, device: Optional[str] = None):
+    """Load a model now (e.g. at service start) rather than on first encode"""
+    return _load(model_name, device)
+
+
+def unload(model_name: Optional[str] = None, device: Optional[str] = None) -> int:
+    """
+    Drop loaded models from the registry, all of them when model_name is None
+
+    Handles stay valid and reload on their next encode. Models with a close()
+    method (e.g. EmbeddingPool) are closed. Returns the number of models dropped.
+    """
+    with _lock:
+        keys = [
+            key for key in _models
+            if model_name is None or key == (model_name, device)
+        ]
+        for key in keys:
+            _release(_models.pop(key))
+        return len(keys)
+
+
+def register_embedder(model_name: str, factory: Callable[[str, Optional[str]], object]) -> None:
+    """Load model_name with factory(model_name, device) instead of SentenceTransformer"""
+    with _lock:
+        _factories[model_name] = factory
+        for key in [key for key in _models if key[0] == model_name]:
+            _release(_models.pop(key))
+
+
+def loaded_models() -> list[tuple[str, Optional[str]]]:
+    """(model_name, device) pairs currently loaded"""
+    return list(_models)
+
+
+def _load(model_name: str, device: Optional[str]):
+    """Shared instance for (model_name, device), loaded once under the registry lock"""
+    key = (model_name, device)
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _lock:
+        if key not in _models:
+            factory = _factories.get(model_name)
+            if factory:
+                _models[key] = factory(model_name, device)
+            elif SENTENCE_TRANSFORMERS_AVAILABLE:
+                _models[key] = SentenceTransformer(model_name, device=device)
+            else:
+                raise ImportError(
+                    "sentence-transformers required: pip install sentence-transformers"
+                )
+        return _models[key]
+
+
+def _release(model) -> None:
+    """Close a dropped model that holds external resources"""
+    close = getattr(model, "close", None)
+    if callable(close):
+        close()
@@ -0,0 +1,150 @@
+"""Embedding cache | Persistent (model, text hash) to vector cache on a memory-mapped array"""
+
+from pathlib import Path
+from typing import Callable, Optional, Sequence
+import hashlib
+import json
+import re
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: single writer per cache directory
+    fcntl = None
+
+
+class EmbeddingCache:
+    """
+    Append-only embedding store shared by every collection using the same model
+
+    vectors.f32 holds float32 rows; keys.bin holds (16-byte text digest, int64 row)
+    records. Appends take a file lock, so several processes can share a cache.
+    """
+
+    KEY_SIZE = 16
+    RECORD_DTYPE = np.dtype([("key", f"V{KEY_SIZE}"), ("row", "<i8")])
+
+    def __init__(self, cache_dir: Path, model_name: str):
+        self.model_name = model_name
+        self.cache_dir = Path(cache_dir) / re.sub(r"[^\w.-]", "_", model_name)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self.vectors_file = self.cache_dir / "vectors.f32"
+        self.keys_file = self.cache_dir / "keys.bin"
+        self.meta_file = self.cache_dir / "meta.json"
+        self.lock_file = self.cache_dir / ".lock"
+
+        self.dim: Optional[int] = None
+        self._rows: dict[bytes, int] = {}
+        self._keys_read = 0
+        self._vectors: Optional[np.memmap] = None
+        self._refresh()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def key(self, text: str) -> bytes:
+        """Digest identifying text within this model's cache"""
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=self.KEY_SIZE).digest()
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Cached vector for text as a read-only view of the memory map, or None"""
+        row = self._rows.get(self.key(text))
+        if row is None or self._vectors is None:
+            return None
+        return self._vectors[row]
+
+    def encode(
+        self, texts: Sequence[str], encoder: Callable[[list[str]], np.ndarray]
+    ) -> np.ndarray:
+        """
+        Embed texts, calling encoder only for cache misses
+
+        Returns:
+            float32 array (len(texts), dim) in input order
+        """
+        keys = [self.key(text) for text in texts]
+        missing = self._missing(keys, texts)
+
+        if missing:
+            self._refresh()
+            missing = self._missing(keys, texts)
+
+        if missing:
+            vectors = np.asarray(encoder(list(missing.values())), dtype=np.float32)
+            self._append(list(missing), vectors)
+
+        if not keys:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+
+        rows = np.fromiter((self._rows[key] for key in keys), dtype=np.int64, count=len(keys))
+        return np.asarray(self._vectors[rows], dtype=np.float32)
+
+    def _missing(self, keys: list[bytes], texts: Sequence[str]) -> dict[bytes, str]:
+        """Uncached keys mapped to their text, duplicates collapsed"""
+        missing: dict[bytes, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in self._rows:
+                missing.setdefault(key, text)
+        return missing
+
+    def _append(self, keys: list[bytes], vectors: np.ndarray) -> None:
+        """Append rows under the file lock, recording their row numbers"""
+        with self.lock_file.open("a") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+
+            if self.dim is None:
+                self._load_meta()
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+                self.meta_file.write_text(json.dumps({"model": self.model_name, "dim": self.dim}))
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dim {vectors.shape[1]} != cached dim {self.dim}")
+
+            row_bytes = self.dim * 4
+            size = self.vectors_file.stat().st_size if self.vectors_file.exists() else 0
+            start = size // row_bytes
+
+            with self.vectors_file.open("ab") as f:
+                f.truncate(start * row_bytes)  # drop a torn row from an interrupted write
+                f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+
+            records = np.empty(len(keys), dtype=self.RECORD_DTYPE)
+            records["key"] = keys
+            records["row"] = np.arange(start, start + len(keys))
+            with self.keys_file.open("ab") as f:
+                size = f.tell()
+                f.truncate(size - size % self.RECORD_DTYPE.itemsize)
+                f.write(records.tobytes())
+
+        self._refresh()
+
+    def _refresh(self) -> None:
+        """Pick up rows appended since the last read, by this or another process"""
+        if self.dim is None:
+            self._load_meta()
+        if self.dim is None or not self.keys_file.exists():
+            return
+
+        with self.keys_file.open("rb") as f:
+            f.seek(self._keys_read)
+            data = f.read()
+
+        usable = len(data) - len(data) % self.RECORD_DTYPE.itemsize
+        if usable:
+            records = np.frombuffer(data[:usable], dtype=self.RECORD_DTYPE)
+            self._rows.update(zip((bytes(k) for k in records["key"]), records["row"].tolist()))
+            self._keys_read += usable
+
+        n_rows = self.vectors_file.stat().st_size // (self.dim * 4)
+        if n_rows and (self._vectors is None or len(self._vectors) != n_rows):
+            self._vectors = np.memmap(
+                self.vectors_file, dtype=np.float32, mode="r", shape=(n_rows, self.dim)
+            )
+
+    def _load_meta(self) -> None:
+        """Read embedding dimension recorded by the first writer"""
+        if self.meta_file.exists():
+            self.dim = json.loads(self.meta_file.read_text())["dim"]
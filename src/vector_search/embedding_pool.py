@@ -0,0 +1,179 @@
+"""Embedding pool | Multi-process CPU encoding with shared-memory results"""
+
+from multiprocessing import shared_memory
+from typing import Callable, Optional
+import multiprocessing
+import os
+
+import numpy as np
+
+from . import embedders
+
+_worker_model = None
+
+
+class EmbeddingPool:
+    """
+    Worker processes each holding the model once, behind a SentenceTransformer-style encode
+
+    Sentences are sorted by length and cut into batches of similar length, so
+    each batch pads little; batches go to idle workers longest first, and every
+    worker writes its vectors straight into one shared-memory result array.
+    Register it with register_pool to make VectorSearch and SemanticSearchEngine
+    encode through it.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        processes: Optional[int] = None,
+        device: Optional[str] = "cpu",
+        batch_size: int = 64,
+        factory: Optional[Callable[[str, Optional[str]], object]] = None,
+    ):
+        """
+        Args:
+            model_name: sentence-transformers model loaded in every worker
+            processes: Worker count, default os.cpu_count()
+            device: Model device inside the workers
+            batch_size: Sentences per task and per forward pass
+            factory: Picklable factory(model_name, device) replacing SentenceTransformer
+        """
+        self.model_name = model_name
+        self.processes = processes or os.cpu_count() or 1
+        self.device = device
+        self.batch_size = batch_size
+
+        threads = max(1, (os.cpu_count() or 1) // self.processes)
+        context = multiprocessing.get_context("spawn")  # fork would copy torch thread state
+        self._pool = context.Pool(
+            self.processes,
+            initializer=_init_worker,
+            initargs=(model_name, device, factory, threads),
+        )
+        self.dim: int = self._pool.apply(_worker_dimension)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        """Embedding width, as reported by the workers' model"""
+        return self.dim
+
+    def encode(self, sentences, batch_size: Optional[int] = None, **kwargs) -> np.ndarray:
+        """
+        Encode across the workers (SentenceTransformer.encode keyword arguments)
+
+        Returns:
+            float32 array (len(sentences), dim), or (dim,) for a single string
+        """
+        kwargs.pop("show_progress_bar", None)
+        kwargs.pop("convert_to_numpy", None)
+
+        single = isinstance(sentences, str)
+        sentences = [sentences] if single else list(sentences)
+        batch_size = batch_size or self.batch_size
+
+        if not sentences:
+            return np.empty((0, self.dim), dtype=np.float32)
+
+        order = np.argsort([-len(sentence) for sentence in sentences], kind="stable")
+        tasks = [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
+
+        shm = shared_memory.SharedMemory(create=True, size=len(sentences) * self.dim * 4)
+        try:
+            for _ in self._pool.imap_unordered(
+                _encode_into,
+                (
+                    (shm.name, len(sentences), self.dim, rows, [sentences[i] for i in rows], kwargs)
+                    for rows in tasks
+                ),
+            ):
+                pass
+
+            shape = (len(sentences), self.dim)
+            vectors = np.ndarray(shape, dtype=np.float32, buffer=shm.buf).copy()
+        finally:
+            shm.close()
+            shm.unlink()
+
+        return vectors[0] if single else vectors
+
+    def close(self) -> None:
+        """Stop the worker processes"""
+        self._pool.close()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def register_pool(
+    model_name: str,
+    processes: Optional[int] = None,
+    device: Optional[str] = "cpu",
+    batch_size: int = 64,
+    factory: Optional[Callable[[str, Optional[str]], object]] = None,
+) -> None:
+    """Serve model_name from an EmbeddingPool wherever the model registry loads it"""
+    embedders.register_embedder(
+        model_name,
+        lambda name, requested_device: EmbeddingPool(
+            name, processes, requested_device or device, batch_size, factory
+        ),
+    )
+
+
+def _init_worker(
+    model_name: str, device: Optional[str], factory: Optional[Callable], threads: int
+) -> None:
+    """Load the worker's model once and keep its intra-op threads to its share of cores"""
+    global _worker_model
+
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+    if factory:
+        _worker_model = factory(model_name, device)
+    elif embedders.SENTENCE_TRANSFORMERS_AVAILABLE:
+        _worker_model = embedders.SentenceTransformer(model_name, device=device)
+    else:
+        raise ImportError("sentence-transformers required: pip install sentence-transformers")
+
+
+def _worker_dimension() -> int:
+    """Embedding width of the worker's model"""
+    return int(_worker_model.get_sentence_embedding_dimension())
+
+
+def _encode_into(task: tuple) -> int:
+    """Encode one length bucket and write its rows into the shared result array"""
+    shm_name, n_rows, dim, rows, sentences, kwargs = task
+
+    vectors = np.asarray(
+        _worker_model.encode(
+            sentences, batch_size=len(sentences), show_progress_bar=False, **kwargs
+        ),
+        dtype=np.float32,
+    )
+
+    shm = _attach(shm_name)
+    try:
+        np.ndarray((n_rows, dim), dtype=np.float32, buffer=shm.buf)[rows] = vectors
+    finally:
+        shm.close()
+
+    return len(rows)
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Open the parent's segment; the parent alone unlinks it"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        # spawned workers share the parent's resource tracker, so the parent's
+        # unlink also clears this registration
+        return shared_memory.SharedMemory(name=name)
@@ -0,0 +1,229 @@
+"""Lexical retrieval | SQLite FTS5 BM25 index and reciprocal-rank fusion for hybrid search"""
+
+from pathlib import Path
+from typing import Optional, Sequence
+import json
+import re
+import sqlite3
+import threading
+
+from .numpy_index import OPERATORS
+
+# where operators translated to one SQL comparison; NULL-safe like matches_where
+COMPARISONS = {"$eq": "IS", "$ne": "IS NOT", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+
+class LexicalIndex:
+    """
+    Incremental BM25 keyword index over the documents of a vector collection
+
+    where filters run in SQL next to the FTS5 match, so a filtered search still
+    stops at its LIMIT. FILTER_COLUMNS metadata fields are stored as columns;
+    other fields are read from the metadata JSON.
+    """
+
+    FILTER_COLUMNS = ("system", "filename")
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS documents (
+            id INTEGER PRIMARY KEY,
+            doc_id TEXT UNIQUE NOT NULL,
+            metadata TEXT NOT NULL,
+            "system",
+            "filename"
+        );
+        CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5 (
+            content, tokenize = 'porter unicode61'
+        );
+    """
+
+    def __init__(self, db_path: Optional[Path] = None):
+        """
+        Args:
+            db_path: SQLite file; None keeps the index in memory
+        """
+        self.db_path = Path(db_path) if db_path else None
+        self.conn = sqlite3.connect(
+            str(self.db_path) if self.db_path else ":memory:", check_same_thread=False
+        )
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        self._add_filter_columns()
+        self._lock = threading.Lock()  # shared by ingest writers and retriever threads
+
+    def add(
+        self,
+        ids: Sequence[str],
+        documents: Sequence[str],
+        metadatas: Optional[Sequence[Optional[dict]]] = None,
+    ) -> None:
+        """Index documents; ids already present are left unchanged, as in collection.add"""
+        with self._lock, self.conn:
+            for i, (doc_id, document) in enumerate(zip(ids, documents)):
+                exists = self.conn.execute(
+                    "SELECT 1 FROM documents WHERE doc_id = ?", (doc_id,)
+                ).fetchone()
+                if not exists:
+                    self._insert(doc_id, document, metadatas[i] if metadatas is not None else None)
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        documents: Sequence[str],
+        metadatas: Optional[Sequence[Optional[dict]]] = None,
+    ) -> None:
+        """Index documents, replacing entries with the same ids"""
+        with self._lock, self.conn:
+            self._delete(ids)
+            for i, (doc_id, document) in enumerate(zip(ids, documents)):
+                self._insert(doc_id, document, metadatas[i] if metadatas is not None else None)
+
+    def delete(self, ids: Sequence[str]) -> None:
+        """Drop documents from the index"""
+        with self._lock, self.conn:
+            self._delete(ids)
+
+    def search(self, query: str, limit: int = 10, where: Optional[dict] = None) -> list[dict]:
+        """
+        BM25-ranked keyword search, any query term may match
+
+        Returns:
+            dicts with id, score (higher is better), document and metadata
+        """
+        match = self._match_expression(query)
+        if not match:
+            return []
+
+        sql = (
+            "SELECT d.doc_id, bm25(documents_fts) AS rank, documents_fts.content, d.metadata "
+            "FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid "
+            "WHERE documents_fts MATCH ?"
+        )
+        params: list = [match]
+        if where:
+            condition, where_params = self._where_sql(where)
+            sql += f" AND {condition}"
+            params.extend(where_params)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+
+        return [
+            {
+                "id": doc_id,
+                "score": -rank,  # FTS5 bm25() is lower-is-better
+                "document": document,
+                "metadata": json.loads(metadata),
+            }
+            for doc_id, rank, document, metadata in rows
+        ]
+
+    def count(self) -> int:
+        """Return number of indexed documents"""
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the underlying database connection"""
+        self.conn.close()
+
+    def _add_filter_columns(self) -> None:
+        """Add and backfill FILTER_COLUMNS in indexes created before they existed"""
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(documents)")}
+        with self.conn:
+            for column in self.FILTER_COLUMNS:
+                if column not in existing:
+                    self.conn.execute(f'ALTER TABLE documents ADD COLUMN "{column}"')
+                    self.conn.execute(
+                        f'UPDATE documents SET "{column}" = json_extract(metadata, ?)',
+                        (f'$."{column}"',),
+                    )
+
+    def _where_sql(self, where: dict) -> tuple[str, list]:
+        """Translate a ChromaDB-style where filter (see matches_where) into SQL"""
+        clauses: list[str] = []
+        params: list = []
+
+        for key, condition in where.items():
+            if key in ("$and", "$or"):
+                parts = [self._where_sql(clause) for clause in condition]
+                joiner = " AND " if key == "$and" else " OR "
+                empty = "1" if key == "$and" else "0"  # all([]) / any([])
+                clauses.append("(" + joiner.join(sql for sql, _ in parts) + ")" if parts else empty)
+                params.extend(param for _, part_params in parts for param in part_params)
+                continue
+
+            if key in self.FILTER_COLUMNS:
+                field, field_params = f'd."{key}"', []
+            else:
+                field, field_params = "json_extract(d.metadata, ?)", [f'$."{key}"']
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+
+            for operator, operand in condition.items():
+                if operator not in OPERATORS:
+                    raise ValueError(f"Unsupported where operator: {operator}")
+                if operator in ("$in", "$nin"):
+                    marks = ", ".join("?" * len(operand))
+                    sql = f"{field} IN ({marks})" if operator == "$in" else (
+                        f"({field} IS NULL OR {field} NOT IN ({marks}))"
+                    )
+                    params.extend(field_params * sql.count(field) + list(operand))
+                elif operator == "$contains":
+                    sql = f"(typeof({field}) = 'text' AND instr({field}, ?) > 0)"
+                    params.extend(field_params * 2 + [operand])
+                else:
+                    sql = f"{field} {COMPARISONS[operator]} ?"
+                    params.extend(field_params + [operand])
+                clauses.append(sql)
+
+        return " AND ".join(clauses) or "1", params
+
+    def _insert(self, doc_id: str, document: Optional[str], metadata: Optional[dict]) -> None:
+        """Add one document row and its FTS entry inside the caller's transaction"""
+        metadata = metadata or {}
+        cursor = self.conn.execute(
+            'INSERT INTO documents (doc_id, metadata, "system", "filename") VALUES (?, ?, ?, ?)',
+            (doc_id, json.dumps(metadata), *map(metadata.get, self.FILTER_COLUMNS)),
+        )
+        self.conn.execute(
+            "INSERT INTO documents_fts (rowid, content) VALUES (?, ?)",
+            (cursor.lastrowid, document or ""),
+        )
+
+    def _delete(self, ids: Sequence[str]) -> None:
+        """Remove documents by id inside the caller's transaction"""
+        for doc_id in ids:
+            row = self.conn.execute(
+                "SELECT id FROM documents WHERE doc_id = ?", (doc_id,)
+            ).fetchone()
+            if row:
+                self.conn.execute("DELETE FROM documents_fts WHERE rowid = ?", row)
+                self.conn.execute("DELETE FROM documents WHERE id = ?", row)
+
+    def _match_expression(self, query: str) -> str:
+        """Quote query terms so user input never hits FTS5 query syntax"""
+        terms = re.findall(r"\w+", query)
+        return " OR ".join(f'"{term}"' for term in terms)
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[str]], k: int = 60, weights: Optional[Sequence[float]] = None
+) -> list[tuple[str, float]]:
+    """
+    Merge ranked id lists: score(id) = sum of weight / (k + rank), rank from 1
+
+    Returns:
+        (id, fused score) pairs, best first
+    """
+    weights = weights or [1.0] * len(rankings)
+    scores: dict[str, float] = {}
+
+    for ranking, weight in zip(rankings, weights):
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + weight / (k + rank)
+
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,660 @@
+"""NumPy vector index | In-process ChromaDB-compatible collection, exact or IVF search"""
+
+from pathlib import Path
+from typing import Optional, Sequence
+import json
+import threading
+
+import numpy as np
+
+
+OPERATORS = {
+    "$eq": lambda value, operand: value == operand,
+    "$ne": lambda value, operand: value != operand,
+    "$gt": lambda value, operand: value is not None and value > operand,
+    "$gte": lambda value, operand: value is not None and value >= operand,
+    "$lt": lambda value, operand: value is not None and value < operand,
+    "$lte": lambda value, operand: value is not None and value <= operand,
+    "$in": lambda value, operand: value in operand,
+    "$nin": lambda value, operand: value not in operand,
+    "$contains": lambda value, operand: isinstance(value, str) and operand in value,
+}
+
+DEFAULT_INCLUDE = ("documents", "metadatas", "distances")
+QUANTIZATIONS = ("float16", "int8")
+
+
+class NumpyCollection:
+    """
+    Vector collection with the ChromaDB Collection calls VectorSearch makes
+
+    Search is exact by default: distances to every row in blocked matrix products,
+    in the collection's hnsw:space (squared L2 unless set), so scores match the
+    ChromaDB backend. With nlist > 0 an IVF coarse quantizer (k-means) is trained
+    once the collection holds nlist * 39 rows, and queries scan only the nprobe
+    nearest lists. Embeddings must be supplied; there is no embedding function.
+
+    Persistence: vectors.f32 is appended to and memory-mapped, records.jsonl logs
+    ids, documents and metadata, so opening a large collection reads no vectors.
+
+    Quantization: scans run over an in-memory float16 (2x smaller) or int8 (4x,
+    one scale per row) copy, and the best k * rescore candidates are re-scored
+    exactly against the float32 rows. Only a persistent collection saves memory,
+    since its float32 rows stay in the memory-mapped file.
+    """
+
+    VECTORS_FILENAME = "vectors.f32"
+    RECORDS_FILENAME = "records.jsonl"
+    META_FILENAME = "meta.json"
+    CENTROIDS_FILENAME = "centroids.npy"
+    MIN_TRAIN_PER_LIST = 39
+    DECODE_BLOCK = 2048  # quantized rows decoded per product, small enough to stay in cache
+
+    def __init__(
+        self,
+        name: str,
+        persist_directory: Optional[Path] = None,
+        metadata: Optional[dict] = None,
+        nlist: int = 0,
+        nprobe: int = 8,
+        block_size: int = 65536,
+        quantization: Optional[str] = None,
+        rescore: int = 4,
+    ):
+        """
+        Args:
+            name: Collection name, also its directory under persist_directory
+            persist_directory: Storage root; None keeps the collection in memory
+            metadata: Collection metadata (hnsw:space selects l2, cosine or ip)
+            nlist: IVF lists; 0 always searches exhaustively
+            nprobe: Lists scanned per query when IVF is trained
+            block_size: Rows per matrix product during exhaustive scans
+            quantization: None, "float16" or "int8" scan copy of the vectors
+            rescore: Candidates per requested result re-scored in float32
+        """
+        if quantization is not None and quantization not in QUANTIZATIONS:
+            raise ValueError(
+                f"Unknown quantization: {quantization}. Available: {', '.join(QUANTIZATIONS)}"
+            )
+
+        self.name = name
+        self.metadata = dict(metadata or {})
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.block_size = block_size
+        self.quantization = quantization
+        self.rescore = rescore
+        self.path = Path(persist_directory) / name if persist_directory else None
+
+        self.dim: Optional[int] = None
+        self._size = 0  # rows used, including deleted ones
+        self._vectors: Optional[np.ndarray] = None
+        self._sq_norms = np.empty(0, dtype=np.float32)
+        self._codes: Optional[np.ndarray] = None  # quantized scan copy
+        self._scales = np.empty(0, dtype=np.float32)  # int8 row scales
+        self._alive = np.empty(0, dtype=bool)
+        self._ids: list[Optional[str]] = []
+        self._documents: list[Optional[str]] = []
+        self._metadatas: list[Optional[dict]] = []
+        self._rows: dict[str, int] = {}
+
+        self._centroids: Optional[np.ndarray] = None
+        self._trained_size = 0
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._lists: Optional[tuple[np.ndarray, np.ndarray]] = None  # rows by list, bounds
+
+        self._lock = threading.RLock()
+
+        if self.path:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._load()
+
+    @property
+    def space(self) -> str:
+        """Distance function: l2 (squared), cosine or ip"""
+        return self.metadata.get("hnsw:space", "l2")
+
+    @property
+    def resident_bytes(self) -> int:
+        """Vector bytes scanned from RAM: the quantized copy, else the float32 rows"""
+        norms = self._size * self._sq_norms.itemsize
+        if self.quantization:
+            itemsize = np.dtype(self.quantization).itemsize
+            return self._size * ((self.dim or 0) * itemsize + 4) + norms
+        return self._size * (self.dim or 0) * 4 + norms
+
+    def count(self) -> int:
+        """Number of stored documents"""
+        return len(self._rows)
+
+    def add(
+        self,
+        ids: Sequence[str],
+        embeddings,
+        documents: Optional[Sequence[str]] = None,
+        metadatas: Optional[Sequence[Optional[dict]]] = None,
+    ) -> None:
+        """Insert documents; ids already present are left unchanged, as in ChromaDB"""
+        with self._lock:
+            keep = [i for i, doc_id in enumerate(ids) if doc_id not in self._rows]
+            if len(dict.fromkeys(ids[i] for i in keep)) != len(keep):
+                raise ValueError("Duplicate ids in add")
+            self._write(ids, embeddings, documents, metadatas, keep)
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        embeddings,
+        documents: Optional[Sequence[str]] = None,
+        metadatas: Optional[Sequence[Optional[dict]]] = None,
+    ) -> None:
+        """Insert new documents and overwrite existing ones"""
+        with self._lock:
+            last = {doc_id: i for i, doc_id in enumerate(ids)}  # last write of an id wins
+            self._write(ids, embeddings, documents, metadatas, sorted(last.values()))
+
+    def query(
+        self,
+        query_embeddings,
+        n_results: int = 10,
+        where: Optional[dict] = None,
+        include: Sequence[str] = DEFAULT_INCLUDE,
+    ) -> dict[str, list]:
+        """Nearest documents per query, ChromaDB result layout (one list per query)"""
+        if n_results < 1:
+            raise ValueError("n_results must be at least 1")
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+
+        with self._lock:
+            mask = self._where_mask(where)
+
+            if self.count() == 0:
+                empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+                nearest = [empty] * len(queries)
+            elif self._ivf_ready():
+                nearest = [self._search_ivf(query, n_results, mask) for query in queries]
+            else:
+                rows = None if mask is None else np.flatnonzero(mask)
+                nearest = self._search(queries, n_results, rows)
+
+            for rows, distances in nearest:
+                rows = rows.tolist()
+                results["ids"].append([self._ids[row] for row in rows])
+                results["documents"].append([self._documents[row] for row in rows])
+                results["metadatas"].append([self._metadatas[row] for row in rows])
+                results["distances"].append(distances.tolist())
+                if "embeddings" in include:
+                    results.setdefault("embeddings", []).append(self._matrix()[rows])
+
+        for key in ("documents", "metadatas", "distances"):
+            if key not in include:
+                results[key] = None
+        return results
+
+    def get(
+        self,
+        ids: Optional[Sequence[str]] = None,
+        where: Optional[dict] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        include: Sequence[str] = ("documents", "metadatas"),
+    ) -> dict:
+        """Stored documents by id and/or metadata filter, in insertion order"""
+        with self._lock:
+            if ids is not None:
+                rows = [self._rows[doc_id] for doc_id in ids if doc_id in self._rows]
+            else:
+                rows = np.flatnonzero(self._alive[:self._size]).tolist()
+
+            if where:
+                rows = [row for row in rows if matches_where(self._metadatas[row] or {}, where)]
+            rows = rows[offset:offset + limit if limit is not None else None]
+
+            return {
+                "ids": [self._ids[row] for row in rows],
+                "documents": [self._documents[row] for row in rows]
+                if "documents" in include else None,
+                "metadatas": [self._metadatas[row] for row in rows]
+                if "metadatas" in include else None,
+                "embeddings": np.array(self._matrix()[rows])
+                if "embeddings" in include else None,
+            }
+
+    def delete(self, ids: Optional[Sequence[str]] = None, where: Optional[dict] = None) -> None:
+        """Delete documents by id and/or metadata filter"""
+        with self._lock:
+            doomed = self.get(ids=ids, where=where, include=())["ids"]
+            if not doomed:
+                return
+
+            for doc_id in doomed:
+                row = self._rows.pop(doc_id)
+                self._alive[row] = False
+                self._ids[row] = self._documents[row] = self._metadatas[row] = None
+
+            self._log([{"id": doc_id, "deleted": True} for doc_id in doomed])
+
+    def drop(self) -> None:
+        """Delete every document; a persisted collection restarts empty in the same place"""
+        with self._lock:
+            if self.path:
+                self._vectors = None  # release the memory map
+                for filename in (
+                    self.VECTORS_FILENAME, self.RECORDS_FILENAME,
+                    self.META_FILENAME, self.CENTROIDS_FILENAME,
+                ):
+                    (self.path / filename).unlink(missing_ok=True)
+                self.path.rmdir()
+            self.__init__(
+                self.name, self.path.parent if self.path else None, self.metadata,
+                self.nlist, self.nprobe, self.block_size, self.quantization, self.rescore,
+            )
+
+    def _write(self, ids, embeddings, documents, metadatas, positions: list[int]) -> None:
+        """Store the given positions of a batch: overwrite known ids, append new ones"""
+        if not positions:
+            return
+        if embeddings is None:
+            raise ValueError("NumpyCollection requires precomputed embeddings")
+
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(ids):
+            raise ValueError("Expected one embedding per id")
+        if self.dim is None:
+            self.dim = int(vectors.shape[1])
+            self._save_meta()
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding dim {vectors.shape[1]} != collection dim {self.dim}")
+
+        existing = [i for i in positions if ids[i] in self._rows]
+        new = [i for i in positions if ids[i] not in self._rows]
+
+        if existing:
+            rows = np.array([self._rows[ids[i]] for i in existing])
+            self._set_vectors(rows, vectors[existing])
+
+        if new:
+            start = self._append_vectors(vectors[new])
+            for offset, i in enumerate(new):
+                self._rows[ids[i]] = start + offset
+            self._ids.extend(ids[i] for i in new)
+            self._documents.extend([None] * len(new))
+            self._metadatas.extend([None] * len(new))
+
+        records = []
+        for i in positions:
+            row = self._rows[ids[i]]
+            self._documents[row] = documents[i] if documents is not None else None
+            self._metadatas[row] = metadatas[i] if metadatas is not None else None
+            records.append({
+                "id": ids[i],
+                "row": row,
+                "document": self._documents[row],
+                "metadata": self._metadatas[row],
+            })
+        self._log(records)
+
+    def _append_vectors(self, vectors: np.ndarray) -> int:
+        """Append rows, growing the buffer or the backing file; returns the first row"""
+        start, end = self._size, self._size + len(vectors)
+
+        if self.path:
+            vectors_file = self.path / self.VECTORS_FILENAME
+            with vectors_file.open("ab") as f:
+                f.truncate(start * self.dim * 4)  # drop rows never recorded in the log
+                f.write(np.ascontiguousarray(vectors).tobytes())
+            self._vectors = np.memmap(
+                vectors_file, dtype=np.float32, mode="r+", shape=(end, self.dim)
+            )
+        else:
+            if self._vectors is None or end > len(self._vectors):
+                capacity = max(end, 2 * (0 if self._vectors is None else len(self._vectors)), 1024)
+                grown = np.empty((capacity, self.dim), dtype=np.float32)
+                grown[:start] = self._matrix()
+                self._vectors = grown
+            self._vectors[start:end] = vectors
+
+        self._sq_norms = _grow(self._sq_norms, end)
+        self._sq_norms[start:end] = np.einsum("ij,ij->i", vectors, vectors)
+        if self.quantization:
+            if self._codes is None:
+                self._codes = np.empty((0, self.dim), dtype=np.dtype(self.quantization))
+            self._codes = _grow(self._codes, end)
+            self._scales = _grow(self._scales, end)
+            self._codes[start:end], self._scales[start:end] = self._quantize(vectors)
+        self._alive = _grow(self._alive, end)
+        self._alive[start:end] = True
+        self._size = end
+        return start
+
+    def _set_vectors(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        """Overwrite existing rows in place"""
+        self._vectors[rows] = vectors
+        self._sq_norms[rows] = np.einsum("ij,ij->i", vectors, vectors)
+        if self.quantization:
+            self._codes[rows], self._scales[rows] = self._quantize(vectors)
+        assigned = rows < len(self._assignments)  # later rows are assigned on the next query
+        if self._centroids is not None and assigned.any():
+            self._assignments[rows[assigned]] = self._nearest_centroids(vectors[assigned])
+            self._lists = None
+
+    def _matrix(self) -> np.ndarray:
+        """Used rows of the vector store"""
+        if self._vectors is None:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        return self._vectors[:self._size]
+
+    def _distances(
+        self,
+        queries: np.ndarray,
+        vectors: np.ndarray,
+        scales: Optional[np.ndarray] = None,
+        sq_norms: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Query-by-row distances in the collection's space"""
+        products = queries @ vectors.T
+        if scales is not None:
+            products *= scales
+
+        if self.space == "ip":
+            return 1.0 - products
+        if self.space == "cosine":
+            norms = np.sqrt(np.einsum("ij,ij->i", queries, queries))[:, None] * np.sqrt(sq_norms)
+            return 1.0 - products / np.where(norms == 0, 1, norms)
+
+        query_norms = np.einsum("ij,ij->i", queries, queries)[:, None]
+        return np.maximum(query_norms + sq_norms[None, :] - 2.0 * products, 0.0)
+
+    def _search(
+        self, queries: np.ndarray, k: int, rows: Optional[np.ndarray]
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        """Top-k over rows (None: every live row); quantized scans are re-scored exactly"""
+        if not self.quantization:
+            matrix = self._matrix()
+            return self._scan(
+                queries, k, rows, lambda index: (matrix[index], None), self.block_size
+            )
+
+        candidates = self._scan(
+            queries, k * self.rescore, rows, self._decode, min(self.block_size, self.DECODE_BLOCK)
+        )
+        return [self._rescore(query, found, k) for query, (found, _) in zip(queries, candidates)]
+
+    def _scan(
+        self, queries: np.ndarray, k: int, rows: Optional[np.ndarray], vectors_at, block_size: int
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+        Top-k by distance, scanned block_size rows at a time
+
+        vectors_at(rows or slice) returns float32 vectors and optional per-row
+        scales for their products (int8 codes).
+        """
+        total = self._size if rows is None else len(rows)
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        best_distances = np.empty((len(queries), 0), dtype=np.float32)
+
+        for start in range(0, total, block_size):
+            if rows is None:
+                end = min(start + block_size, total)  # buffers may be grown past _size
+                block_rows = np.arange(start, end)
+                distances = self._distances(
+                    queries,
+                    *vectors_at(slice(start, end)),
+                    sq_norms=self._sq_norms[block_rows],
+                )
+                distances[:, ~self._alive[block_rows]] = np.inf
+            else:
+                block_rows = rows[start:start + block_size]
+                distances = self._distances(
+                    queries, *vectors_at(block_rows), sq_norms=self._sq_norms[block_rows]
+                )
+
+            best_rows = np.hstack([best_rows, np.broadcast_to(block_rows, distances.shape)])
+            best_distances = np.hstack([best_distances, distances])
+            if best_rows.shape[1] > k:
+                top = np.argpartition(best_distances, k - 1, axis=1)[:, :k]
+                best_rows = np.take_along_axis(best_rows, top, axis=1)
+                best_distances = np.take_along_axis(best_distances, top, axis=1)
+
+        order = np.argsort(best_distances, axis=1, kind="stable")
+        best_rows = np.take_along_axis(best_rows, order, axis=1)
+        best_distances = np.take_along_axis(best_distances, order, axis=1)
+
+        return [
+            (found[np.isfinite(distances)], distances[np.isfinite(distances)])
+            for found, distances in zip(best_rows, best_distances)
+        ]
+
+    def _rescore(
+        self, query: np.ndarray, rows: np.ndarray, k: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Exact float32 top-k among quantized-scan candidates"""
+        rows = np.sort(rows)  # sequential reads from the memory map
+        distances = self._distances(
+            query[None, :], self._matrix()[rows], sq_norms=self._sq_norms[rows]
+        )[0]
+        order = np.argsort(distances, kind="stable")[:k]
+        return rows[order], distances[order]
+
+    def _quantize(self, vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Scan codes for vectors, with per-row scales (ones for float16)"""
+        if self.quantization == "float16":
+            return vectors.astype(np.float16), np.ones(len(vectors), dtype=np.float32)
+
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    def _decode(self, index) -> tuple[np.ndarray, Optional[np.ndarray]]:
+        """Quantized rows as float32, with the int8 scales to apply to their products"""
+        scales = self._scales[index] if self.quantization == "int8" else None
+        return self._codes[index].astype(np.float32), scales
+
+    def _search_ivf(
+        self, query: np.ndarray, k: int, mask: Optional[np.ndarray]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Top-k among rows of the nprobe lists nearest the query"""
+        self._update_lists()
+        order, bounds = self._lists
+
+        centroid_distances = np.einsum("ij,ij->i", self._centroids, self._centroids) - 2.0 * (
+            self._centroids @ query
+        )
+        probed = np.argsort(centroid_distances)[:self.nprobe]
+        rows = np.concatenate([order[bounds[i]:bounds[i + 1]] for i in probed])
+
+        keep = self._alive[rows] if mask is None else mask[rows]
+        return self._search(query[None, :], k, np.sort(rows[keep]))[0]
+
+    def _ivf_ready(self) -> bool:
+        """Train or retrain the quantizer when enough rows exist; whether IVF applies"""
+        if not self.nlist or self.count() < self.nlist * self.MIN_TRAIN_PER_LIST:
+            return False
+        if self._centroids is None or self.count() >= 2 * self._trained_size:
+            self._train()
+        return True
+
+    def _train(self, iterations: int = 20, seed: int = 0) -> None:
+        """Lloyd's k-means on a sample of live rows"""
+        rng = np.random.default_rng(seed)
+        live = np.flatnonzero(self._alive[:self._size])
+        sample_rows = np.sort(rng.choice(live, min(len(live), self.nlist * 256), replace=False))
+        sample = np.asarray(self._matrix()[sample_rows])
+
+        centroids = sample[rng.choice(len(sample), self.nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = _nearest(sample, centroids)
+            counts = np.bincount(labels, minlength=self.nlist)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = counts == 0
+            centroids[~empty] = sums[~empty] / counts[~empty, None]
+            centroids[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+
+        self._centroids = centroids
+        self._trained_size = self.count()
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._lists = None
+
+        if self.path:
+            np.save(self.path / self.CENTROIDS_FILENAME, centroids)
+            self._save_meta()
+
+    def _update_lists(self) -> None:
+        """Assign rows added since the last query and rebuild the inverted lists"""
+        assigned = len(self._assignments)
+        if assigned < self._size:
+            matrix = self._matrix()
+            fresh = [
+                self._nearest_centroids(matrix[start:min(start + self.block_size, self._size)])
+                for start in range(assigned, self._size, self.block_size)
+            ]
+            self._assignments = np.concatenate([self._assignments, *fresh]).astype(np.int32)
+            self._lists = None
+
+        if self._lists is None:
+            order = np.argsort(self._assignments, kind="stable")
+            bounds = np.searchsorted(self._assignments[order], np.arange(self.nlist + 1))
+            self._lists = (order, bounds)
+
+    def _nearest_centroids(self, vectors: np.ndarray) -> np.ndarray:
+        """IVF list of each vector"""
+        return _nearest(np.asarray(vectors), self._centroids)
+
+    def _where_mask(self, where: Optional[dict]) -> Optional[np.ndarray]:
+        """Live rows passing a metadata filter, None when unfiltered"""
+        if not where:
+            return None
+        return np.fromiter(
+            (
+                alive and matches_where(metadata or {}, where)
+                for alive, metadata in zip(self._alive[:self._size], self._metadatas)
+            ),
+            dtype=bool,
+            count=self._size,
+        )
+
+    def _log(self, records: list[dict]) -> None:
+        """Append record changes after their vectors are written"""
+        if self.path:
+            with (self.path / self.RECORDS_FILENAME).open("a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(record) + "\n" for record in records))
+
+    def _save_meta(self) -> None:
+        """Persist dimension, collection metadata and quantizer state"""
+        if self.path:
+            meta_file = self.path / self.META_FILENAME
+            tmp_file = meta_file.with_suffix(".tmp")
+            tmp_file.write_text(json.dumps({
+                "dim": self.dim,
+                "metadata": self.metadata,
+                "trained_size": self._trained_size,
+            }))
+            tmp_file.replace(meta_file)
+
+    def _load(self) -> None:
+        """Replay the record log and memory-map the vectors"""
+        meta_file = self.path / self.META_FILENAME
+        if not meta_file.exists():
+            self._save_meta()
+            return
+
+        meta = json.loads(meta_file.read_text())
+        self.dim = meta["dim"]
+        self.metadata = {**meta["metadata"], **self.metadata}
+
+        records_file = self.path / self.RECORDS_FILENAME
+        if records_file.exists():
+            with records_file.open(encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # torn final line from an interrupted write
+                    self._replay(record)
+
+        vectors_file = self.path / self.VECTORS_FILENAME
+        if self._size:
+            self._vectors = np.memmap(
+                vectors_file, dtype=np.float32, mode="r+", shape=(self._size, self.dim)
+            )
+            self._alive = _grow(self._alive, self._size)
+            self._sq_norms = np.empty(self._size, dtype=np.float32)
+            if self.quantization:
+                self._codes = np.empty((self._size, self.dim), dtype=np.dtype(self.quantization))
+                self._scales = np.empty(self._size, dtype=np.float32)
+
+            for start in range(0, self._size, self.block_size):
+                block = np.asarray(self._vectors[start:start + self.block_size])
+                end = start + len(block)
+                self._sq_norms[start:end] = np.einsum("ij,ij->i", block, block)
+                if self.quantization:
+                    self._codes[start:end], self._scales[start:end] = self._quantize(block)
+
+        centroids_file = self.path / self.CENTROIDS_FILENAME
+        if centroids_file.exists() and self.nlist:
+            centroids = np.load(centroids_file)
+            if len(centroids) == self.nlist:
+                self._centroids = centroids
+                self._trained_size = meta.get("trained_size", 0)
+
+    def _replay(self, record: dict) -> None:
+        """Apply one logged put or delete"""
+        doc_id = record["id"]
+        if record.get("deleted"):
+            row = self._rows.pop(doc_id, None)
+            if row is not None:
+                self._alive[row] = False
+                self._ids[row] = self._documents[row] = self._metadatas[row] = None
+            return
+
+        row = record["row"]
+        while len(self._ids) <= row:
+            self._ids.append(None)
+            self._documents.append(None)
+            self._metadatas.append(None)
+        self._alive = _grow(self._alive, row + 1)
+
+        self._rows[doc_id] = row
+        self._ids[row] = doc_id
+        self._documents[row] = record["document"]
+        self._metadatas[row] = record["metadata"]
+        self._alive[row] = True
+        self._size = max(self._size, row + 1)
+
+
+def matches_where(metadata: dict, where: dict) -> bool:
+    """Evaluate a ChromaDB-style where filter against one metadata dict"""
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, clause) for clause in condition):
+                return False
+        else:
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            for operator, operand in condition.items():
+                if operator not in OPERATORS:
+                    raise ValueError(f"Unsupported where operator: {operator}")
+                if not OPERATORS[operator](metadata.get(key), operand):
+                    return False
+    return True
+
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the nearest centroid (squared L2) for each vector"""
+    distances = np.einsum("ij,ij->i", centroids, centroids)[None, :] - 2.0 * (vectors @ centroids.T)
+    return distances.argmin(axis=1)
+
+
+def _grow(array: np.ndarray, size: int) -> np.ndarray:
+    """Array with room for at least size rows, doubling to amortise appends"""
+    if size <= len(array):
+        return array
+    grown = np.zeros((max(size, 2 * len(array)),) + array.shape[1:], dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
@@ -0,0 +1,127 @@
+"""Query result cache | LRU/TTL search result cache invalidated by collection writes"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable, Optional
+import copy
+import threading
+import time
+
+_generations: dict[Hashable, int] = {}  # collection scope -> write generation
+_generations_lock = threading.Lock()
+
+
+@dataclass
+class CacheStats:
+    """Counters of a QueryResultCache since creation"""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0  # LRU capacity evictions
+    expirations: int = 0  # entries older than the TTL
+    invalidations: int = 0  # collection writes (generation bumps)
+    size: int = 0
+    generation: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Hits over lookups, 0.0 before the first lookup"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class QueryResultCache:
+    """
+    Search results keyed by query parameters, valid for one collection generation
+
+    The generation counter is process-wide per scope (e.g. persist directory and
+    collection name), so a write through any cache sharing the scope invalidates
+    all of them. Writers call bump() after changing the collection; readers take
+    generation before querying and pass it to put(), so a result computed while
+    a write was in flight is never stored. Writes made outside these caches
+    (other processes, direct collection calls) are only seen once ttl expires.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 4096,
+        ttl: Optional[float] = 300.0,
+        scope: Optional[Hashable] = None,
+    ):
+        """
+        Args:
+            max_size: Entries kept, least recently used evicted first (0 disables)
+            ttl: Seconds an entry stays valid, bounding staleness from writers in
+                other processes; None keeps entries until evicted or invalidated
+            scope: Collection identity whose generation counter is shared; None
+                gives this cache a private counter
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.scope = scope if scope is not None else object()
+        self._entries: OrderedDict[Hashable, tuple[float, int, Any]] = OrderedDict()
+        self._stats = CacheStats()
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        """Collection generation, incremented by every bump() in the scope"""
+        return _generations.get(self.scope, 0)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Copy of the cached result for key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] != self.generation:
+                del self._entries[key]  # collection written through another cache
+                entry = None
+            elif (
+                entry is not None
+                and self.ttl is not None
+                and time.monotonic() - entry[0] > self.ttl
+            ):
+                del self._entries[key]
+                self._stats.expirations += 1
+                entry = None
+
+            if entry is None:
+                self._stats.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            result = entry[2]
+
+        return copy.deepcopy(result)  # callers may mutate their results
+
+    def put(self, key: Hashable, result: Any, generation: int) -> None:
+        """Store a result computed at generation, unless the collection changed since"""
+        if self.max_size <= 0:
+            return
+
+        result = copy.deepcopy(result)
+        with self._lock:
+            if generation != self.generation:
+                return
+
+            self._entries[key] = (time.monotonic(), generation, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats.evictions += 1
+
+    def bump(self) -> int:
+        """Invalidate all entries after a collection write; returns the new generation"""
+        with _generations_lock:
+            generation = _generations[self.scope] = _generations.get(self.scope, 0) + 1
+        with self._lock:
+            self._entries.clear()
+            self._stats.invalidations += 1
+        return generation
+
+    def stats(self) -> CacheStats:
+        """Snapshot of hit/miss/eviction counters"""
+        with self._lock:
+            return CacheStats(
+                **{**vars(self._stats), "size": len(self._entries), "generation": self.generation}
+            )
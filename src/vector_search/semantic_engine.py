@@ -1,13 +1,22 @@
 """Semantic search engine | Complete workflow with indexing and retrieval"""
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 import hashlib
+import json
+import time
+
+from .chunking import chunk_markdown
+from .embedders import RegistryEmbeddingFunction
+from .lexical import LexicalIndex, reciprocal_rank_fusion
+from .query_cache import CacheStats, QueryResultCache
 
 try:
     import chromadb
+    import numpy as np
     from chromadb.config import Settings
-    from sentence_transformers import SentenceTransformer
     CHROMADB_AVAILABLE = True
 except ImportError:
     CHROMADB_AVAILABLE = False
@@ -16,75 +25,222 @@ except ImportError:
 class SemanticSearchEngine:
     """Complete semantic search workflow with master prompt indexing"""
 
+    SEARCH_MODES = ("vector", "lexical", "hybrid")
+
     def __init__(
         self,
         collection_name: str = "prompts",
         persist_directory: str = ".chromadb",
         embedding_model: str = "all-MiniLM-L6-v2",
+        chunk_size: Optional[int] = None,
+        chunk_overlap: int = 200,
+        device: Optional[str] = None,
+        result_cache_size: int = 4096,
+        result_cache_ttl: Optional[float] = 300.0,
+        lexical: bool = False,
     ):
+        """
+        Args:
+            chunk_size: Index files as Markdown chunks of at most this many characters,
+                aggregated back to files at search time; None embeds whole files
+            chunk_overlap: Characters shared by consecutive chunks of a section
+            device: Embedding model device, shared through the model registry
+            result_cache_size: search_similar results cached until the next index
+                write by any engine or VectorSearch on this collection (0 disables)
+            result_cache_ttl: Seconds a cached result stays valid (None: no expiry)
+            lexical: Also keep a BM25 keyword index, for search_similar(mode="hybrid")
+        """
         if not CHROMADB_AVAILABLE:
-            raise ImportError("ChromaDB and sentence-transformers required")
+            raise ImportError("ChromaDB required: pip install chromadb")
 
         self.collection_name = collection_name
         self.persist_dir = Path(persist_directory)
         self.embedding_model = embedding_model
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
 
-        self.embedder = SentenceTransformer(embedding_model)
+        # model loaded on first encode and shared with every collection using it
+        self.embedding_function = RegistryEmbeddingFunction(embedding_model, device)
+        self.embedder = self.embedding_function.embedder
 
         self.client = chromadb.PersistentClient(
             path=str(self.persist_dir),
             settings=Settings(anonymized_telemetry=False),
         )
 
-        self.collection = self.client.get_or_create_collection(
-            name=collection_name,
-            metadata={"embedding_model": embedding_model},
+        try:
+            self.collection = self.client.get_or_create_collection(
+                name=collection_name,
+                metadata={"embedding_model": embedding_model},
+                embedding_function=self.embedding_function,
+            )
+        except ValueError:
+            # created with ChromaDB's default function, which it will not replace;
+            # writes and queries below pass registry embeddings explicitly
+            self.collection = self.client.get_collection(collection_name)
+
+        self.manifest_path = self.persist_dir / f"{collection_name}.manifest.json"
+        self.manifest: dict[str, dict] = self._load_manifest()
+        self.last_index_timings: dict[str, float] = {}
+
+        self.lexical: Optional[LexicalIndex] = None
+        if lexical:
+            self.lexical = LexicalIndex(self.persist_dir / f"{collection_name}.lexical.sqlite3")
+            if self.collection.count() and not self.lexical.count():
+                # collection indexed before the keyword index was enabled
+                existing = self.collection.get(include=["documents", "metadatas"])
+                self.lexical.upsert(existing["ids"], existing["documents"], existing["metadatas"])
+            self._retrievers = ThreadPoolExecutor(max_workers=2, thread_name_prefix="retriever")
+        self.result_cache = QueryResultCache(
+            result_cache_size,
+            result_cache_ttl,
+            scope=(str(self.persist_dir.resolve()), collection_name),
         )
 
-        self.indexed_files: dict[str, str] = {}
+    @property
+    def indexed_files(self) -> dict[str, str]:
+        """Indexed filename to content hash"""
+        return {name: entry["hash"] for name, entry in self.manifest.items()}
 
     def index_directory(
-        self, directory: Path, pattern: str = "*.md", force_reindex: bool = False
+        self,
+        directory: Path,
+        pattern: str = "*.md",
+        force_reindex: bool = False,
+        batch_size: int = 32,
+        read_workers: int = 8,
     ) -> int:
-        """Index all files in directory matching pattern"""
-        files = sorted(Path(directory).glob(pattern))
+        """
+        Index all files in directory matching pattern
+
+        Files whose size and mtime match the persisted manifest are skipped without
+        being read; files removed from the directory are removed from the collection.
+        Changed files are read and hashed once on a thread pool and upserted in
+        batches of batch_size (the embedder's batch size), while reading continues.
+        With chunking enabled, only chunks whose content hash changed are embedded.
+        Stage timings are kept in last_index_timings.
+        """
+        started = time.perf_counter()
+        timings = {"scan": 0.0, "read": 0.0, "upsert": 0.0}
+
+        directory = Path(directory)
+        directory_key = str(directory.resolve())
+        files = sorted(directory.glob(pattern))
+        changed = self._remove_deleted(directory_key)
+
+        candidates = []
+        for filepath in files:
+            try:
+                stat = filepath.stat()
+            except OSError:
+                continue
 
-        if not files:
-            return 0
+            entry = self.manifest.get(filepath.name)
+            if (
+                not force_reindex
+                and entry
+                and (entry["size"], entry["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns)
+            ):
+                continue
+            candidates.append((filepath, stat))
 
+        timings["scan"] = time.perf_counter() - started
         indexed_count = 0
+        documents: list[tuple[str, str, dict]] = []
+        refreshed: list[tuple[str, str, dict]] = []
+        stale_ids: list[str] = []
+        records: list[tuple[str, dict]] = []
+
+        def flush() -> None:
+            nonlocal indexed_count, changed
+            upsert_started = time.perf_counter()
+            try:
+                for start in range(0, len(documents), batch_size):
+                    batch = documents[start:start + batch_size]
+                    contents = [content for _, content, _ in batch]
+                    self.collection.upsert(
+                        ids=[doc_id for doc_id, _, _ in batch],
+                        embeddings=self.embedding_function(contents),
+                        documents=contents,
+                        metadatas=[metadata for _, _, metadata in batch],
+                    )
+                if refreshed:
+                    # unchanged chunks keep their embeddings, only position metadata moves
+                    self.collection.update(
+                        ids=[doc_id for doc_id, _, _ in refreshed],
+                        metadatas=[metadata for _, _, metadata in refreshed],
+                    )
+                if stale_ids:
+                    self.collection.delete(ids=stale_ids)
+                if self.lexical:
+                    written = documents + refreshed
+                    self.lexical.delete(stale_ids)
+                    self.lexical.upsert(
+                        [doc_id for doc_id, _, _ in written],
+                        [content for _, content, _ in written],
+                        [metadata for _, _, metadata in written],
+                    )
+                for name, record in records:
+                    self.manifest[name] = record
+                indexed_count += len(records)
+                changed = True
+            except Exception:
+                pass
+            if documents or refreshed or stale_ids:
+                self.result_cache.bump()
+            timings["upsert"] += time.perf_counter() - upsert_started
+            documents.clear()
+            refreshed.clear()
+            stale_ids.clear()
+            records.clear()
+
+        with ThreadPoolExecutor(max_workers=read_workers) as pool:
+            results = _bounded_map(pool, _read_and_hash, [f for f, _ in candidates], batch_size * 4)
+
+            for (filepath, stat), result in zip(candidates, _timed(results, timings, "read")):
+                if result is None:
+                    continue
 
-        for filepath in files:
-            file_hash = self._file_hash(filepath)
-
-            if not force_reindex and filepath.name in self.indexed_files:
-                if self.indexed_files[filepath.name] == file_hash:
+                content, file_hash = result
+                record = {
+                    "hash": file_hash,
+                    "size": stat.st_size,
+                    "mtime_ns": stat.st_mtime_ns,
+                    "directory": directory_key,
+                }
+
+                entry = self.manifest.get(filepath.name)
+                if not force_reindex and entry and entry["hash"] == file_hash:
+                    self.manifest[filepath.name] = record
+                    changed = True
                     continue
 
-            try:
-                content = filepath.read_text(encoding="utf-8")
-            except Exception:
-                continue
+                file_documents = self._file_documents(filepath.name, content)
+                if self.chunk_size is not None:
+                    record["chunks"] = [doc_id for doc_id, _, _ in file_documents]
 
-            metadata = {
-                "filename": filepath.name,
-                "system": self._extract_system_name(filepath.name),
-                "indexed": datetime.now().isoformat(),
-            }
+                previous = set(self._entry_ids(filepath.name, entry)) if entry else set()
+                current = {doc_id for doc_id, _, _ in file_documents}
+                stale_ids.extend(previous - current)
 
-            doc_id = hashlib.md5(filepath.name.encode()).hexdigest()
+                if self.chunk_size is not None and not force_reindex:
+                    refreshed.extend(doc for doc in file_documents if doc[0] in previous)
+                    file_documents = [doc for doc in file_documents if doc[0] not in previous]
 
-            try:
-                self.collection.upsert(
-                    ids=[doc_id],
-                    documents=[content],
-                    metadatas=[metadata],
-                )
+                documents.extend(file_documents)
+                records.append((filepath.name, record))
 
-                self.indexed_files[filepath.name] = file_hash
-                indexed_count += 1
-            except Exception:
-                pass
+                if len(documents) >= batch_size:
+                    flush()
+
+        if records:
+            flush()
+
+        if changed:
+            self._save_manifest()
+
+        timings["total"] = time.perf_counter() - started
+        self.last_index_timings = timings
 
         return indexed_count
 
@@ -93,67 +249,249 @@ class SemanticSearchEngine:
         query: str,
         n_results: int = 5,
         filter_system: Optional[str] = None,
+        mode: str = "vector",
     ) -> list[dict]:
-        """Search for semantically similar content"""
+        """
+        Search for semantically similar content
+
+        mode="hybrid" (needs lexical=True) runs the vector query and a BM25 keyword
+        search concurrently and merges both rankings with reciprocal-rank fusion,
+        so exact identifiers and rare tokens are found too; "lexical" runs the
+        keyword search alone.
+        Those modes add bm25 (and, for hybrid, the fused score) to each result;
+        a retriever that missed a file reports None.
+
+        Chunk matches are aggregated to one result per file, scored by its best
+        chunk, whose text becomes the result's content snippet. Results are
+        cached per (query, n_results, filter_system, mode) until the next write.
+        """
+        if mode not in self.SEARCH_MODES:
+            raise ValueError(f"Unknown mode: {mode}. Available: {', '.join(self.SEARCH_MODES)}")
+        if mode != "vector" and self.lexical is None:
+            raise ValueError(f"mode={mode!r} needs SemanticSearchEngine(lexical=True)")
+
+        cache_key = (query, n_results, filter_system, mode)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        generation = self.result_cache.generation
+
         where = {}
         if filter_system:
             where["system"] = {"$contains": filter_system}
 
+        fetch = n_results if self.chunk_size is None and mode == "vector" else n_results * 4
+
+        vector_hits: list[dict] = []
+        lexical_hits: list[dict] = []
+        if mode == "hybrid":
+            vector = self._retrievers.submit(self._vector_hits, query, fetch, where)
+            lexical = self._retrievers.submit(self.lexical.search, query, fetch, where)
+            vector_hits, lexical_hits = vector.result(), lexical.result()
+        elif mode == "lexical":
+            lexical_hits = self.lexical.search(query, fetch, where)
+        else:
+            vector_hits = self._vector_hits(query, fetch, where)
+
+        hits = {hit["id"]: hit for hit in vector_hits}
+        for hit in lexical_hits:
+            hits.setdefault(hit["id"], {**hit, "similarity": None})["bm25"] = hit["score"]
+
+        if mode == "hybrid":
+            ranking = reciprocal_rank_fusion(
+                [[hit["id"] for hit in vector_hits], [hit["id"] for hit in lexical_hits]]
+            )
+        else:
+            ranking = [(hit["id"], None) for hit in vector_hits or lexical_hits]
+
+        formatted = []
+        seen = set()
+
+        for doc_id, fused in ranking:
+            hit = hits[doc_id]
+            metadata = hit["metadata"]
+            if metadata["filename"] in seen:
+                continue  # ranked best first, so the first chunk seen is the best
+            seen.add(metadata["filename"])
+
+            result = {
+                "id": metadata.get("parent", doc_id),
+                "filename": metadata["filename"],
+                "system": metadata["system"],
+                "content": hit["document"][:200] + "...",
+                "similarity": hit["similarity"],
+            }
+            if "heading" in metadata:
+                result["heading"] = metadata["heading"]
+            if mode != "vector":
+                result["bm25"] = hit.get("bm25")
+            if mode == "hybrid":
+                result["score"] = fused
+            formatted.append(result)
+
+            if len(formatted) == n_results:
+                break
+
+        if formatted:  # empty may mean a failed query; don't pin it
+            self.result_cache.put(cache_key, formatted, generation)
+        return formatted
+
+    def cache_stats(self) -> CacheStats:
+        """Result cache hit/miss/eviction counters and current generation"""
+        return self.result_cache.stats()
+
+    def _vector_hits(self, query: str, n_results: int, where: dict) -> list[dict]:
+        """Vector query results as dicts with id, document, metadata and similarity"""
         try:
             results = self.collection.query(
-                query_texts=[query],
+                query_embeddings=self.embedding_function([query]),
                 n_results=n_results,
                 where=where if where else None,
             )
         except Exception:
             return []
 
-        formatted = []
-
-        if results["ids"] and len(results["ids"][0]) > 0:
-            for i in range(len(results["ids"][0])):
-                formatted.append({
-                    "id": results["ids"][0][i],
-                    "filename": results["metadatas"][0][i]["filename"],
-                    "system": results["metadatas"][0][i]["system"],
-                    "content": results["documents"][0][i][:200] + "...",
-                    "similarity": 1.0 - results["distances"][0][i],
-                })
-
-        return formatted
-
-    def find_duplicates(self, similarity_threshold: float = 0.95) -> list[tuple]:
-        """Find near-duplicate prompts in collection"""
-        all_docs = self.collection.get()
-
-        if not all_docs["ids"]:
+        if not results["ids"]:
             return []
 
-        duplicates = []
-
-        for i, doc_id in enumerate(all_docs["ids"]):
-            content = all_docs["documents"][i]
-
-            results = self.collection.query(
-                query_texts=[content],
-                n_results=3,
+        return [
+            {
+                "id": doc_id,
+                "document": document,
+                "metadata": metadata,
+                "similarity": 1.0 - distance,
+            }
+            for doc_id, document, metadata, distance in zip(
+                results["ids"][0],
+                results["documents"][0],
+                results["metadatas"][0],
+                results["distances"][0],
             )
+        ]
+
+    def find_duplicates(
+        self, similarity_threshold: float = 0.95, block_size: int = 2048
+    ) -> list[tuple]:
+        """
+        Find near-duplicate prompts in collection
+
+        Compares stored embeddings with blocked matrix products, so every pair at
+        or above the threshold is found without re-embedding or per-document
+        queries. Each file pair is reported once, most similar first; chunked files
+        are compared by their most similar chunks.
+
+        Returns:
+            (filename, filename, similarity) tuples
+        """
+        filenames, vectors = self._stored_embeddings()
+        if not filenames:
+            return []
 
-            for j, similar_id in enumerate(results["ids"][0][1:]):
-                similarity = 1.0 - results["distances"][0][j + 1]
-
-                if similarity >= similarity_threshold:
-                    duplicates.append((
-                        all_docs["metadatas"][i]["filename"],
-                        results["metadatas"][0][j + 1]["filename"],
-                        similarity,
-                    ))
-
-        return duplicates
-
-    def _file_hash(self, filepath: Path) -> str:
-        """Calculate MD5 hash of file content"""
-        return hashlib.md5(filepath.read_bytes()).hexdigest()
+        pairs = _similar_pairs(vectors, similarity_threshold, self._distance_space(), block_size)
+
+        # chunked files: keep the best chunk pair per file pair, skip chunks of one file
+        duplicates: dict[frozenset, tuple[str, str, float]] = {}
+        for i, j, similarity in pairs:
+            if filenames[i] != filenames[j]:
+                key = frozenset((filenames[i], filenames[j]))
+                duplicates.setdefault(key, (filenames[i], filenames[j], similarity))
+        return list(duplicates.values())
+
+    def find_duplicate_clusters(
+        self, similarity_threshold: float = 0.95, block_size: int = 2048
+    ) -> list[list[str]]:
+        """Group near-duplicates into clusters (connected pairs), largest first"""
+        parent: dict[str, str] = {}
+
+        def root(name: str) -> str:
+            parent.setdefault(name, name)
+            while parent[name] != name:
+                parent[name] = parent[parent[name]]
+                name = parent[name]
+            return name
+
+        for a, b, _ in self.find_duplicates(similarity_threshold, block_size):
+            parent[root(a)] = root(b)
+
+        clusters: dict[str, list[str]] = {}
+        for name in parent:
+            clusters.setdefault(root(name), []).append(name)
+
+        return sorted((sorted(c) for c in clusters.values()), key=len, reverse=True)
+
+    def _stored_embeddings(self) -> tuple[list[str], "np.ndarray"]:
+        """Filenames and embeddings of every indexed document"""
+        all_docs = self.collection.get(include=["embeddings", "metadatas"])
+        if not all_docs["ids"]:
+            return [], np.empty((0, 0), dtype=np.float32)
+
+        filenames = [metadata["filename"] for metadata in all_docs["metadatas"]]
+        return filenames, np.asarray(all_docs["embeddings"], dtype=np.float32)
+
+    def _distance_space(self) -> str:
+        """Collection distance function, so similarities match search_similar"""
+        return (self.collection.metadata or {}).get("hnsw:space", "l2")
+
+    def _remove_deleted(self, directory_key: str) -> bool:
+        """Delete documents of files that vanished from an indexed directory"""
+        deleted = [
+            name for name, entry in self.manifest.items()
+            if entry["directory"] == directory_key and not (Path(directory_key) / name).exists()
+        ]
+        if not deleted:
+            return False
+
+        ids = [doc_id for name in deleted for doc_id in self._entry_ids(name, self.manifest[name])]
+        self.collection.delete(ids=ids)
+        if self.lexical:
+            self.lexical.delete(ids)
+        self.result_cache.bump()
+        for name in deleted:
+            del self.manifest[name]
+        return True
+
+    def _load_manifest(self) -> dict[str, dict]:
+        """Read the persisted filename -> hash/size/mtime manifest"""
+        if self.manifest_path.exists():
+            try:
+                return json.loads(self.manifest_path.read_text())
+            except ValueError:
+                pass
+        return {}
+
+    def _save_manifest(self) -> None:
+        """Atomically persist the manifest next to the ChromaDB store"""
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.manifest))
+        tmp_path.replace(self.manifest_path)
+
+    def _file_documents(self, filename: str, content: str) -> list[tuple[str, str, dict]]:
+        """(id, text, metadata) documents for a file: itself, or its chunks"""
+        metadata = {
+            "filename": filename,
+            "system": self._extract_system_name(filename),
+            "indexed": datetime.now().isoformat(),
+        }
+        if self.chunk_size is None:
+            return [(self._doc_id(filename), content, metadata)]
+
+        parent = self._doc_id(filename)
+        documents = {}
+        for chunk in chunk_markdown(content, self.chunk_size, self.chunk_overlap):
+            # content-addressed ids: an unchanged chunk keeps its id and embedding
+            doc_id = f"{parent}:{hashlib.sha1(chunk.text.encode()).hexdigest()[:16]}"
+            documents.setdefault(doc_id, (doc_id, chunk.text, {
+                **metadata, "parent": parent, "chunk": chunk.index, "heading": chunk.heading,
+            }))
+        return list(documents.values())
+
+    def _entry_ids(self, filename: str, entry: dict) -> list[str]:
+        """Collection ids holding a manifest entry's file"""
+        return entry.get("chunks", [self._doc_id(filename)])
+
+    def _doc_id(self, filename: str) -> str:
+        """Stable document id for an indexed file"""
+        return hashlib.md5(filename.encode()).hexdigest()
 
     def _extract_system_name(self, filename: str) -> str:
         """Extract system name from filename"""
@@ -167,4 +505,80 @@ class SemanticSearchEngine:
             return "unknown"
 
 
+def _read_and_hash(filepath: Path) -> Optional[tuple[str, str]]:
+    """Read a file once, returning (utf-8 content, md5 hex digest) or None"""
+    try:
+        data = filepath.read_bytes()
+        return data.decode("utf-8"), hashlib.md5(data).hexdigest()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def _bounded_map(
+    pool: ThreadPoolExecutor, fn, items: list, max_pending: int
+) -> Iterator:
+    """Ordered pool.map that keeps at most max_pending results in flight"""
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _timed(results: Iterator, timings: dict[str, float], stage: str) -> Iterator:
+    """Yield from results, adding time spent waiting on them to timings[stage]"""
+    while True:
+        waited = time.perf_counter()
+        try:
+            result = next(results)
+        except StopIteration:
+            return
+        finally:
+            timings[stage] += time.perf_counter() - waited
+        yield result
+
+
+def _similar_pairs(
+    vectors: "np.ndarray", threshold: float, space: str, block_size: int
+) -> list[tuple[int, int, float]]:
+    """
+    All index pairs i < j with similarity >= threshold, via tiled matrix products
+
+    Similarity is 1 - distance in the collection's space (l2: squared euclidean,
+    cosine, ip), the same score search_similar reports.
+    """
+    if space == "cosine":
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+    squared = np.einsum("ij,ij->i", vectors, vectors)
+
+    pairs = []
+    n = len(vectors)
+
+    for row_start in range(0, n, block_size):
+        rows = vectors[row_start:row_start + block_size]
+
+        for col_start in range(row_start, n, block_size):
+            similarity = rows @ vectors[col_start:col_start + block_size].T
+            if space == "l2":
+                similarity = 1.0 - (
+                    squared[row_start:row_start + block_size, None]
+                    + squared[None, col_start:col_start + block_size]
+                    - 2.0 * similarity
+                )
+
+            i, j = np.nonzero(similarity >= threshold)
+            i_global, j_global = i + row_start, j + col_start
+            upper = i_global < j_global
+            pairs.extend(zip(
+                i_global[upper].tolist(),
+                j_global[upper].tolist(),
+                similarity[i[upper], j[upper]].tolist(),
+            ))
+
+    return sorted(pairs, key=lambda pair: pair[2], reverse=True)
+
+
 from datetime import datetime
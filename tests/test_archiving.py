@@ -1,8 +1,10 @@
 """Tests for prompt archiving"""
 
 import pytest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from pathlib import Path
-from src.prompts import PromptArchive, ArchivedPrompt
+from src.prompts import PromptArchive, ArchivedPrompt, RetentionPolicy
 
 
 @pytest.fixture
@@ -63,3 +65,196 @@ def test_filename_sanitization(archive):
     assert "spaces" not in archived.filepath.name
     assert "!" not in archived.filepath.name
     assert archived.filepath.name.endswith(".md")
+
+
+def test_keyword_search(archive):
+    """Should find archived prompts by keyword with snippets"""
+    archive.save("Summarize the quarterly revenue report", "claude", "Finance", quality_score=8.0)
+    archive.save("Write a haiku about autumn leaves", "openai", "Poetry", quality_score=6.0)
+
+    results = archive.search("revenue")
+    assert len(results) == 1
+    assert results[0].prompt.goal == "Finance"
+    assert "[revenue]" in results[0].snippet
+
+
+def test_keyword_search_filters(archive):
+    """Search should honour target system and minimum quality score"""
+    archive.save("Classify support tickets", "claude", "Triage", quality_score=9.0)
+    archive.save("Classify support emails", "openai", "Triage mail", quality_score=5.0)
+
+    assert len(archive.search("classify support")) == 2
+    assert len(archive.search("classify", target_system="openai")) == 1
+    assert len(archive.search("classify", min_score=7.0)) == 1
+
+
+def test_stats_rollups(archive):
+    """Stats should aggregate counts, scores and pass rates per system"""
+    archive.save("Prompt 1", "claude", "Goal 1", quality_score=8.0, bias_risk="low")
+    archive.save("Prompt 2", "claude", "Goal 2", quality_score=6.0, bias_risk="medium")
+    archive.save("Prompt 3", "openai", "Goal 3", quality_score=9.0, bias_risk="low")
+
+    stats = {s.group["target_system"]: s for s in archive.stats(group_by="target_system")}
+
+    assert stats["claude"].count == 2
+    assert stats["claude"].mean_score == 7.0
+    assert stats["claude"].pass_rate == 0.5
+    assert stats["claude"].bias_risk == {"low": 1, "medium": 1}
+    assert stats["claude"].histogram[8] == 1
+    assert stats["openai"].count == 1
+
+
+def test_rebuild_index(archive):
+    """Rebuild should recover index and rollups from archived files"""
+    archive.save("Quarterly revenue summary", "claude", "Finance", quality_score=8.0)
+    archive.save("Autumn haiku", "openai", "Poetry", quality_score=6.0)
+    archive.index.rebuild([])
+    assert archive.stats(group_by=()) == []
+
+    assert archive.rebuild_index() == 2
+    assert archive.search("revenue")[0].prompt.target_system == "claude"
+    assert archive.stats(group_by=(), window=1)[0].count == 2
+
+
+
+
+def test_stats_window_counts_today_as_first_day(archive):
+    """window=N should cover today and the N-1 days before it"""
+    yesterday = (datetime.now() - timedelta(days=1)).isoformat()
+    archive.index.add("old.md", yesterday, "claude", "Old", 8.0, "low", "Old prompt")
+    archive.save("New prompt", "claude", "New", quality_score=6.0)
+
+    assert archive.stats(group_by=(), window=1)[0].count == 1
+    assert archive.stats(group_by=(), window=2)[0].count == 2
+
+def test_index_rebuilt_when_missing(archive):
+    """Reopening an archive without its index should rebuild it from the files"""
+    archive.save("Quarterly revenue summary", "claude", "Finance", quality_score=8.0)
+    archive.index.close()
+    (archive.archive_dir / PromptArchive.INDEX_FILENAME).unlink()
+
+    reopened = PromptArchive(archive.archive_dir)
+    assert reopened.search("revenue")[0].prompt.goal == "Finance"
+
+
+def test_save_from_another_thread(archive):
+    """Saving from a worker thread should index the prompt"""
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        list(pool.map(lambda i: archive.save(f"Prompt {i}", "claude", f"Goal {i}"), range(4)))
+
+    assert archive.index.count() == 4
+
+
+def test_incremental_export(archive, tmp_path):
+    """Export should only append prompts archived since the last run"""
+    pytest.importorskip("numpy")
+    from src.prompts.archive_export import ArchiveExporter
+
+    export_dir = tmp_path / "export"
+    archive.save("Prompt 1", "claude", "Goal 1", quality_score=7.0, bias_risk="low")
+    archive.save("Prompt 2", "openai", "Goal 2", quality_score=9.0, bias_risk="medium")
+
+    first = archive.export_metadata(export_dir, format="npy")
+    assert first.rows == 2
+
+    archive.save("Prompt 3", "claude", "A much longer goal", quality_score=5.0)
+    assert archive.export_metadata(export_dir).rows == 1
+    assert archive.export_metadata(export_dir).rows == 0
+
+    table = ArchiveExporter(archive.index, export_dir).load()
+    assert len(table) == 3
+    assert list(table["goal"]) == ["Goal 1", "Goal 2", "A much longer goal"]
+
+
+
+def test_parquet_load_without_parts(archive, tmp_path):
+    """Loading a Parquet export with no parts should give an empty table"""
+    pytest.importorskip("pyarrow")
+    from src.prompts.archive_export import COLUMNS, ArchiveExporter
+
+    table = ArchiveExporter(archive.index, tmp_path / "export", format="parquet").load()
+    assert table.num_rows == 0
+    assert table.column_names == COLUMNS
+
+def test_export_skips_rebuilt_and_resaved_entries(archive, tmp_path):
+    """Rebuilding the index or re-indexing a path should not re-export it"""
+    pytest.importorskip("numpy")
+
+    export_dir = tmp_path / "export"
+    saved = archive.save("Prompt 1", "claude", "Goal 1", quality_score=7.0)
+    archive.save("Prompt 2", "openai", "Goal 2", quality_score=9.0)
+    assert archive.export_metadata(export_dir, format="npy").rows == 2
+
+    assert archive.rebuild_index() == 2
+    archive.index.add(
+        str(saved.filepath), saved.timestamp, "claude", "Goal 1", 8.0, "low", "x"
+    )
+    assert archive.export_metadata(export_dir).rows == 0
+
+    archive.save("Prompt 3", "claude", "Goal 3", quality_score=5.0)
+    assert archive.export_metadata(export_dir).rows == 1
+
+
+def test_retention_dry_run(archive):
+    """Dry run should report reclaimable files without touching the archive"""
+    archive.save("Prompt 1 " * 50, "claude", "Goal 1", quality_score=8.0)
+    later = datetime.now() + timedelta(days=45)
+
+    report = archive.apply_retention(RetentionPolicy(hot_days=30), now=later)
+
+    assert report.dry_run
+    assert report.files_compacted == 1
+    assert report.bytes_reclaimed > 0
+    assert len(list(archive.archive_dir.glob("*.md"))) == 1
+
+
+def test_retention_compacts_into_bundles(archive):
+    """Compacted prompts stay listable, searchable and readable"""
+    archive.save("Quarterly revenue summary", "claude", "Finance", quality_score=8.0)
+    later = datetime.now() + timedelta(days=45)
+
+    report = archive.apply_retention(RetentionPolicy(hot_days=30), dry_run=False, now=later)
+
+    assert report.files_compacted == 1
+    assert not list(archive.archive_dir.glob("*.md"))
+
+    listed = archive.list_archived()
+    assert len(listed) == 1
+    assert listed[0].filepath.parent.suffix == ".zip"
+    assert "revenue" in archive.read(archive.search("revenue")[0].prompt.filepath)
+
+
+def test_retention_drops_past_horizon(archive):
+    """Prompts past the horizon are kept only if they pass the keep rule"""
+    archive.save("Good prompt", "claude", "Keep me", quality_score=9.0)
+    archive.save("Weak prompt", "claude", "Drop me", quality_score=4.0)
+    archive.apply_retention(
+        RetentionPolicy(hot_days=30), dry_run=False, now=datetime.now() + timedelta(days=45)
+    )
+
+    policy = RetentionPolicy(hot_days=30, horizon_days=365, min_quality_score=8.0)
+    later = datetime.now() + timedelta(days=400)
+    report = archive.apply_retention(policy, dry_run=False, now=later)
+
+    assert report.files_dropped == 1
+    assert [a.goal for a in archive.list_archived()] == ["Keep me"]
+    assert archive.stats(group_by=())[0].count == 1
+
+
+def test_stats_drop_emptied_groups(archive):
+    """Groups whose prompts were all removed should disappear from stats"""
+    archive.save("Claude prompt", "claude", "Kept", quality_score=8.0)
+    removed = archive.save("OpenAI prompt", "openai", "Removed", quality_score=6.0)
+    archive.index.remove(str(removed.filepath))
+
+    assert [s.group for s in archive.stats(group_by="target_system")] == [
+        {"target_system": "claude"}
+    ]
+    assert archive.index.conn.execute("SELECT COUNT(*) FROM rollups").fetchone()[0] == 1
+
+
+def test_save_records_template_version(archive):
+    """Archived prompts should record the template version they came from"""
+    archive.save("Prompt", "claude", "Goal", template_version="summary@abc123def456")
+
+    assert archive.list_archived()[0].template_version == "summary@abc123def456"
@@ -0,0 +1,273 @@
+"""Tests for semantic search engine"""
+
+import asyncio
+
+import numpy as np
+import pytest
+from src.vector_search import embedders
+from src.vector_search.async_api import AsyncSemanticSearchEngine
+from src.vector_search.chunking import chunk_markdown
+from src.vector_search.embedding_pool import register_pool
+from src.vector_search.semantic_engine import SemanticSearchEngine
+
+
+class WordCountModel:
+    """Picklable stand-in model for worker-pool tests"""
+
+    def __init__(self, name, device):
+        self.name = name
+
+    def get_sentence_embedding_dimension(self):
+        return 2
+
+    def encode(self, sentences, **kwargs):
+        return np.array([[len(s.split()), 1.0] for s in sentences], dtype=np.float32)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Create temporary semantic search engine"""
+    return SemanticSearchEngine(
+        collection_name="test_prompts",
+        persist_directory=str(tmp_path / ".chromadb"),
+    )
+
+
+def test_find_duplicates_and_clusters(engine):
+    """Every near-duplicate pair should be reported once and clustered"""
+    rng = np.random.default_rng(0)
+    base = rng.normal(size=(4, 16)).astype(np.float32)
+    base /= np.linalg.norm(base, axis=1, keepdims=True)
+    vectors = np.vstack([base, base[0] + 0.01, base[0] + 0.02])
+
+    engine.collection.upsert(
+        ids=[str(i) for i in range(len(vectors))],
+        embeddings=vectors,
+        documents=[f"doc {i}" for i in range(len(vectors))],
+        metadatas=[{"filename": f"p{i}.md", "system": "claude"} for i in range(len(vectors))],
+    )
+
+    pairs = engine.find_duplicates(similarity_threshold=0.95, block_size=2)
+
+    found = {(a, b) for a, b, _ in pairs}
+    assert found == {("p0.md", "p4.md"), ("p0.md", "p5.md"), ("p4.md", "p5.md")}
+    assert engine.find_duplicate_clusters(similarity_threshold=0.95) == [
+        ["p0.md", "p4.md", "p5.md"]
+    ]
+
+
+def test_manifest_persists_across_restarts(engine, tmp_path):
+    """A fresh engine should skip unchanged files and drop deleted ones"""
+    prompts = tmp_path / "prompts"
+    prompts.mkdir()
+    for i in range(3):
+        (prompts / f"claude_prompt_{i}.md").write_text(f"Prompt number {i}")
+
+    assert engine.index_directory(prompts) == 3
+
+    restarted = SemanticSearchEngine(
+        collection_name="test_prompts", persist_directory=str(engine.persist_dir)
+    )
+    assert restarted.index_directory(prompts) == 0
+
+    (prompts / "claude_prompt_0.md").unlink()
+    (prompts / "claude_prompt_1.md").write_text("Rewritten prompt with new content")
+
+    assert restarted.index_directory(prompts) == 1
+    assert restarted.collection.count() == 2
+    assert sorted(restarted.indexed_files) == ["claude_prompt_1.md", "claude_prompt_2.md"]
+
+    (prompts / "notes.txt").write_text("Plain text notes")
+    assert restarted.index_directory(prompts, pattern="*.txt") == 1
+    assert restarted.collection.count() == 3
+
+
+def test_index_directory_batches_upserts(engine, tmp_path):
+    """Changed files should be upserted in batches with stage timings"""
+    prompts = tmp_path / "prompts"
+    prompts.mkdir()
+    for i in range(5):
+        (prompts / f"openai_prompt_{i}.md").write_text(f"Prompt number {i}")
+
+    upserts = []
+    original_upsert = engine.collection.upsert
+
+    def recording_upsert(**kwargs):
+        upserts.append(len(kwargs["ids"]))
+        return original_upsert(**kwargs)
+
+    engine.collection.upsert = recording_upsert
+
+    assert engine.index_directory(prompts, batch_size=2) == 5
+    assert upserts == [2, 2, 1]
+    assert set(engine.last_index_timings) == {"scan", "read", "upsert", "total"}
+
+
+def test_chunk_markdown_respects_boundaries():
+    """Chunks should stay within size and start at headings"""
+    sections = [f"## Part {i}\n\n" + " ".join(f"w{i}_{k}" for k in range(80)) for i in range(3)]
+    chunks = chunk_markdown("\n\n".join(sections), chunk_size=200, chunk_overlap=40)
+
+    assert all(len(chunk.text) <= 200 for chunk in chunks)
+    assert [c.heading for c in chunks if c.text.startswith("## ")] == ["Part 0", "Part 1", "Part 2"]
+    assert {c.heading for c in chunks} == {"Part 0", "Part 1", "Part 2"}
+
+    with pytest.raises(ValueError):
+        chunk_markdown("text", chunk_size=100, chunk_overlap=100)
+
+
+def test_chunk_markdown_keeps_fitting_paragraphs_whole():
+    """Paragraphs that fit a chunk should not be split; overlaps start at a word"""
+    first = " ".join(f"alpha{k}" for k in range(118))[:950]
+    second = " ".join(f"beta{k}" for k in range(50))[:350].rsplit(" ", 1)[0]
+    chunks = chunk_markdown(f"{first}\n\n{second}", chunk_size=1000, chunk_overlap=200)
+
+    assert chunks[0].text == first
+    assert chunks[1].text.endswith(f"\n\n{second}")
+    overlap = chunks[1].text.split("\n\n")[0]
+    assert first.endswith(f" {overlap}") and len(overlap) <= 200
+
+
+def test_chunked_index_reembeds_only_changed_chunks(tmp_path):
+    """Editing one section should re-embed only that section's chunks"""
+    engine = SemanticSearchEngine(
+        collection_name="test_chunks",
+        persist_directory=str(tmp_path / ".chromadb"),
+        chunk_size=300,
+        chunk_overlap=50,
+    )
+    prompts = tmp_path / "prompts"
+    prompts.mkdir()
+    sections = [
+        f"## Section {i}\n\n" + " ".join(f"term{i}_{k}" for k in range(60)) for i in range(4)
+    ]
+    (prompts / "claude_long.md").write_text("\n\n".join(sections))
+
+    assert engine.index_directory(prompts) == 1
+    total = engine.collection.count()
+    assert total > 4
+
+    results = engine.search_similar("Section 2", n_results=3)
+    assert [r["filename"] for r in results] == ["claude_long.md"]
+    assert "heading" in results[0]
+
+    upserts = []
+    original_upsert = engine.collection.upsert
+
+    def recording_upsert(**kwargs):
+        upserts.extend(kwargs["ids"])
+        return original_upsert(**kwargs)
+
+    engine.collection.upsert = recording_upsert
+    (prompts / "claude_long.md").write_text("\n\n".join(sections[:3] + ["## Section 3\n\nEdited"]))
+
+    assert engine.index_directory(prompts) == 1
+    assert len(upserts) == 1
+    assert engine.collection.count() < total
+
+    (prompts / "claude_long.md").unlink()
+    engine.index_directory(prompts)
+    assert engine.collection.count() == 0
+
+
+def test_hybrid_search_matches_exact_identifiers(engine, tmp_path):
+    """Hybrid mode should surface files containing a rare identifier"""
+    with pytest.raises(ValueError):
+        engine.search_similar("ZQ-9081", mode="hybrid")
+    engine = SemanticSearchEngine("hybrid_prompts", str(tmp_path / ".chromadb"), lexical=True)
+    prompts = tmp_path / "prompts"
+    prompts.mkdir()
+    (prompts / "claude_billing.md").write_text("Investigate error ZQ-9081 in invoices")
+    for i in range(4):
+        (prompts / f"openai_prompt_{i}.md").write_text(f"General writing prompt number {i}")
+
+    engine.index_directory(prompts)
+    results = engine.search_similar("ZQ-9081", n_results=3, mode="hybrid")
+
+    assert results[0]["filename"] == "claude_billing.md"
+    assert results[0]["bm25"] > 0
+    assert "score" in results[0]
+    assert engine.search_similar("ZQ-9081", mode="lexical")[0]["similarity"] is None
+
+    (prompts / "claude_billing.md").unlink()
+    engine.index_directory(prompts)
+    assert engine.search_similar("ZQ-9081", mode="lexical") == []
+
+
+def test_search_similar_cache_invalidated_by_reindex(engine, tmp_path):
+    """Re-indexing should drop cached search results"""
+    prompts = tmp_path / "prompts"
+    prompts.mkdir()
+    (prompts / "claude_a.md").write_text("Summarize the quarterly report")
+    engine.index_directory(prompts)
+
+    assert len(engine.search_similar("quarterly report")) == 1
+    assert len(engine.search_similar("quarterly report")) == 1
+    assert engine.cache_stats().hits == 1
+
+    (prompts / "claude_b.md").write_text("Summarize the annual report")
+    engine.index_directory(prompts)
+    assert len(engine.search_similar("quarterly report")) == 2
+
+
+def test_async_engine_indexes_and_searches(engine, tmp_path):
+    """Async engine calls should match their blocking counterparts"""
+    prompts = tmp_path / "prompts"
+    prompts.mkdir()
+    (prompts / "claude_a.md").write_text("Summarize the quarterly report")
+
+    async def run():
+        async with AsyncSemanticSearchEngine(engine) as searcher:
+            indexed = await searcher.index_directory(prompts)
+            results = await asyncio.gather(*(searcher.search_similar("report") for _ in range(3)))
+            return indexed, results
+
+    indexed, results = asyncio.run(run())
+    assert indexed == 1
+    assert [result[0]["filename"] for result in results] == ["claude_a.md"] * 3
+
+
+def test_engines_encode_through_shared_registry_model(tmp_path):
+    """Engines should embed with one registry model, also for pre-existing collections"""
+    loads = []
+
+    class Model:
+        def encode(self, sentences, **kwargs):
+            return np.array([[len(s), s.count("e"), 1.0] for s in sentences], dtype=np.float32)
+
+    embedders.register_embedder("registry-test", lambda name, device: loads.append(name) or Model())
+    persist = tmp_path / ".chromadb"
+    SemanticSearchEngine("legacy_prompts", str(persist)).client.get_or_create_collection(
+        "legacy_default"
+    )
+    prompts = tmp_path / "prompts"
+    prompts.mkdir()
+    (prompts / "claude_a.md").write_text("Summarize the report")
+
+    try:
+        for name in ("first_prompts", "second_prompts", "legacy_default"):
+            engine = SemanticSearchEngine(name, str(persist), embedding_model="registry-test")
+            assert engine.index_directory(prompts) == 1
+            assert engine.search_similar("report")[0]["filename"] == "claude_a.md"
+        assert loads == ["registry-test"]
+    finally:
+        embedders.unload("registry-test")
+
+
+def test_registered_pool_serves_engine_encoding(tmp_path):
+    """An engine whose model is registered as a pool should encode in the workers"""
+    register_pool("pool-engine-test", processes=1, factory=WordCountModel)
+    prompts = tmp_path / "prompts"
+    prompts.mkdir()
+    (prompts / "claude_a.md").write_text("one two three")
+
+    try:
+        engine = SemanticSearchEngine(
+            "pool_prompts", str(tmp_path / ".chromadb"), embedding_model="pool-engine-test"
+        )
+        assert engine.index_directory(prompts) == 1
+        stored = engine.collection.get(include=["embeddings"])["embeddings"]
+        assert np.asarray(stored).tolist() == [[3.0, 1.0]]
+        assert ("pool-engine-test", None) in embedders.loaded_models()
+    finally:
+        embedders.unload("pool-engine-test")
@@ -0,0 +1,231 @@
+"""Tests for prompt templates"""
+
+import io
+import os
+import pytest
+from src.prompts import TemplateManager, PromptTemplate
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """Create manager with temporary templates directory"""
+    return TemplateManager(templates_dir=tmp_path / "templates")
+
+
+def test_render_template(manager):
+    """Should substitute variables and leave unknown ones intact"""
+    manager.add_template("greet", "Hello ${user}, see $other", description="Greeting")
+
+    assert manager.render_template("greet", user="Ada") == "Hello Ada, see $other"
+
+
+def test_template_variables():
+    """Variables should be extracted once at construction"""
+    template = PromptTemplate("t", "Analyze ${data} for $focus and ${data}")
+
+    assert template.variables == {"data", "focus"}
+    assert sorted(template.get_variables()) == ["data", "focus"]
+
+
+def test_compiled_render_matches_safe_substitute():
+    """Compiled rendering should keep safe_substitute semantics"""
+    from string import Template
+
+    text = "Cost: $$${amount} for ${item}s, $unknown and a bare $ sign"
+    variables = {"amount": 5, "item": "widget"}
+
+    rendered = PromptTemplate("t", text).render(**variables)
+    assert rendered == Template(text).safe_substitute(**variables)
+    assert rendered == "Cost: $5 for widgets, $unknown and a bare $ sign"
+
+
+def test_strict_render_reports_missing():
+    """Strict mode should list missing variables instead of rendering"""
+    template = PromptTemplate("t", "Analyze ${data} for ${focus}, costs in $$USD")
+
+    assert template.missing_variables({"data": "x"}) == ["focus"]
+    with pytest.raises(ValueError, match="focus"):
+        template.render_strict(data="x")
+    assert template.render_strict(data="x", focus="y") == "Analyze x for y, costs in $USD"
+
+
+def test_loaded_template_is_cached(manager):
+    """Templates loaded from disk should be parsed once while unchanged"""
+    (manager.templates_dir / "disk.txt").write_text("# From disk\nHi ${user}")
+
+    first = manager.get_template("disk")
+    assert first.description == "From disk"
+    assert manager.get_template("disk") is first
+
+
+def test_changed_template_is_reloaded(manager):
+    """Cached templates should be reloaded when file mtime or size changes"""
+    template_file = manager.templates_dir / "disk.txt"
+    template_file.write_text("Hi ${user}")
+    first = manager.get_template("disk")
+
+    template_file.write_text("Hello there ${user}")
+    os.utime(template_file, ns=(0, 0))
+
+    assert manager.get_template("disk") is not first
+    assert manager.render_template("disk", user="Ada") == "Hello there Ada"
+
+    template_file.unlink()
+    assert manager.get_template("disk") is None
+
+
+def test_render_many_rows_and_columns(manager):
+    """Bulk render should accept row dicts or a column mapping, lazily"""
+    manager.add_template("pair", "${a}-${b}")
+
+    rendered = manager.render_many("pair", [{"a": 1, "b": 2}, {"a": 3, "b": 4}])
+    assert not isinstance(rendered, list)
+    assert list(rendered) == ["1-2", "3-4"]
+
+    columns = {"a": [1, 3], "b": [2, 4]}
+    assert list(manager.render_many("pair", columns)) == ["1-2", "3-4"]
+
+
+def test_render_many_to_stream_and_file(manager, tmp_path):
+    """Bulk render should write straight to a stream or file path"""
+    manager.add_template("pair", "${a}-${b}")
+    rows = [{"a": i, "b": i * 2} for i in range(5)]
+
+    stream = io.StringIO()
+    assert manager.render_many("pair", rows, out=stream, chunksize=2) == 5
+    assert stream.getvalue() == "0-0\n1-2\n2-4\n3-6\n4-8\n"
+
+    out_file = tmp_path / "rendered.txt"
+    assert manager.render_many("pair", rows, out=out_file, processes=2) == 5
+    assert out_file.read_text() == stream.getvalue()
+
+
+def test_template_versions(manager):
+    """Every save should keep an immutable content-hashed version"""
+    first = manager.add_template("summary", "Summarize ${text}")
+    second = manager.add_template("summary", "Summarize ${text} in ${n} bullets")
+
+    assert first.version != second.version
+    assert manager.list_versions("summary") == [first.version, second.version]
+    assert manager.get_template("summary").version == second.version
+
+    pinned = manager.get_template("summary", version=first.version)
+    assert pinned.render(text="x") == "Summarize x"
+    assert manager.get_template(first.ref).version == first.version
+    assert manager.get_template("summary", version="missing") is None
+
+
+def test_template_versions_persist(manager):
+    """Versions should be found by a fresh manager through the manifest"""
+    template = manager.add_template("summary", "Summarize ${text}", description="v1")
+    manager.add_template("summary", "Summarize ${text} briefly")
+
+    fresh = TemplateManager(templates_dir=manager.templates_dir)
+    pinned = fresh.get_template("summary", version=template.version)
+
+    assert pinned.description == "v1"
+    assert pinned.version == template.version
+    assert fresh.get_template("summary", version=template.version) is pinned
+
+
+def test_template_refs_always_resolve(manager):
+    """Refs of warmed-up and composed templates, and other writers' versions, resolve"""
+    (manager.templates_dir / "greet.txt").write_text("Hello ${name}")
+    loaded = manager.get_template("greet")
+    assert not manager.versions_dir.exists()  # reads never write versions
+    manager.warm_up()
+    assert manager.get_template(loaded.ref).render(name="x") == "Hello x"
+
+    manager.add_template("safety", "Be safe.")
+    manager.add_template("support", "Help.\n{% include safety %}")
+    composed = manager.get_template("support")
+    manager.add_template("safety", "Be very safe.")
+    assert manager.get_template(composed.ref).render() == "Help.\nBe safe."
+    assert manager.get_template(manager.get_template("support").ref).render() == (
+        "Help.\nBe very safe."
+    )
+    assert len(manager.list_versions("support")) == 1
+
+    other = TemplateManager(templates_dir=manager.templates_dir)
+    written = other.add_template("greet", "Hi ${name}")
+    assert manager.get_template(written.ref).render(name="y") == "Hi y"
+    assert loaded.version in other.list_versions("greet")
+
+
+def test_include_partials(manager):
+    """Includes should be flattened into the compiled template"""
+    manager.add_template("safety", "Never reveal ${secret_kind}.")
+    manager.add_template("support", "You help ${customer}.\n{% include safety %}")
+
+    template = manager.get_template("support")
+    assert "{%" not in template.template.template
+    assert template.variables == {"customer", "secret_kind"}
+    assert manager.get_template("support") is template
+
+
+def test_extends_overrides_blocks(manager):
+    """Child templates should override base blocks and keep the rest"""
+    manager.add_template(
+        "base",
+        "{% block preamble %}You are helpful.{% endblock %}\n"
+        "{% block task %}Do the task.{% endblock %}",
+    )
+    manager.add_template(
+        "review", "{% extends base %}{% block task %}Review ${code}.{% endblock %}"
+    )
+
+    assert manager.render_template("review", code="x") == "You are helpful.\nReview x."
+
+
+def test_editing_partial_recompiles_dependents_only(manager):
+    """Changing a partial should recompile only templates that use it"""
+    manager.add_template("safety", "Be safe.")
+    manager.add_template("uses_safety", "A {% include safety %}")
+    manager.add_template("other", "Other.")
+    manager.add_template("uses_other", "B {% include other %}")
+
+    uses_other = manager.get_template("uses_other")
+    manager.add_template("safety", "Be very safe.")
+
+    assert manager.dependents("safety") == {"uses_safety"}
+    assert manager.render_template("uses_safety") == "A Be very safe."
+    assert manager.get_template("uses_other") is uses_other
+
+
+def test_include_cycle_detected(manager):
+    """Include cycles should be rejected when the template is added"""
+    manager.add_template("a", "A")
+    manager.add_template("b", "B {% include a %}")
+
+    with pytest.raises(ValueError, match="cycle"):
+        manager.add_template("a", "A {% include b %}")
+
+    assert manager.render_template("b") == "B A"
+
+
+def test_warm_up_and_list_templates(manager):
+    """Warm up should index and compile every template on disk"""
+    (manager.templates_dir / "partials").mkdir()
+    (manager.templates_dir / "partials" / "safety.txt").write_text("Be safe.")
+    (manager.templates_dir / "main.txt").write_text("Hi. {% include partials/safety %}")
+    manager.add_template("added", "Added ${x}")
+
+    fresh = TemplateManager(templates_dir=manager.templates_dir, preload=True)
+
+    assert fresh.list_templates() == ["added", "main", "partials/safety"]
+    assert fresh.warm_up() == 3
+    assert fresh.render_template("main") == "Hi. Be safe."
+
+
+def test_snapshot_round_trip(manager, tmp_path):
+    """Snapshots should restore templates without reparsing unchanged files"""
+    manager.add_template("greet", "Hello ${user}", description="Greeting")
+    snapshot = tmp_path / "templates.snapshot.json"
+    assert manager.save_snapshot(snapshot) == 1
+
+    fresh = TemplateManager(templates_dir=manager.templates_dir, snapshot=snapshot)
+    cached = fresh._file_cache["greet"][3]
+
+    assert fresh.list_templates() == ["greet"]
+    assert fresh.get_template("greet") is cached
+    assert cached.description == "Greeting"
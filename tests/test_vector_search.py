@@ -1,8 +1,29 @@
 """Tests for vector search module"""
 
+import asyncio
+
+import numpy as np
 import pytest
 from pathlib import Path
-from src.vector_search import VectorSearch
+from src.vector_search import NumpyCollection, VectorSearch, embedders
+from src.vector_search.async_api import AsyncVectorSearch
+from src.vector_search.embedding_cache import EmbeddingCache
+from src.vector_search.embedding_pool import EmbeddingPool
+from src.vector_search.lexical import LexicalIndex, reciprocal_rank_fusion
+from src.vector_search.query_cache import QueryResultCache
+
+
+class LengthModel:
+    """Tiny picklable stand-in model for worker-pool tests"""
+
+    def __init__(self, name, device):
+        self.name = name
+
+    def get_sentence_embedding_dimension(self):
+        return 3
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        return np.array([[len(s), s.count(" "), batch_size] for s in sentences], dtype=np.float32)
 
 
 @pytest.fixture
@@ -43,3 +64,453 @@ def test_metadata_filtering(vector_search):
 
     results = vector_search.search("code", top_k=5, where={"lang": "python"})
     assert len(results["documents"][0]) >= 1
+
+
+def test_embedding_cache_encodes_misses_only(tmp_path):
+    """Cache should encode each unseen text once and keep input order"""
+    encoded = []
+
+    def encoder(texts):
+        encoded.extend(texts)
+        return np.array([[len(t), 1.0] for t in texts])
+
+    cache = EmbeddingCache(tmp_path / "cache", "all-MiniLM-L6-v2")
+    vectors = cache.encode(["aa", "b", "aa"], encoder)
+
+    assert encoded == ["aa", "b"]
+    assert vectors.dtype == np.float32
+    assert vectors[:, 0].tolist() == [2.0, 1.0, 2.0]
+
+    reopened = EmbeddingCache(tmp_path / "cache", "all-MiniLM-L6-v2")
+    assert reopened.encode(["b", "ccc"], encoder)[:, 0].tolist() == [1.0, 3.0]
+    assert encoded == ["aa", "b", "ccc"]
+    assert reopened.get("aa").tolist() == [2.0, 1.0]
+
+
+def test_add_documents_uses_embedding_cache(tmp_path):
+    """Collections sharing a cache directory should reuse embeddings"""
+    first = VectorSearch(
+        collection_name="first_collection",
+        persist_directory=str(tmp_path / ".chromadb"),
+        embedding_cache_dir=str(tmp_path / "embeddings"),
+    )
+    first.add_documents(documents=["Python programming"], ids=["1"])
+
+    second = VectorSearch(
+        collection_name="second_collection",
+        persist_directory=str(tmp_path / ".chromadb"),
+        embedding_cache_dir=str(tmp_path / "embeddings"),
+    )
+    second.add_documents(documents=["Python programming", "Machine learning"], ids=["1", "2"])
+
+    assert len(second.embedding_cache) == 2
+    assert second.count() == 2
+
+
+def test_ingest_resumes_from_checkpoint(vector_search, tmp_path):
+    """Streaming ingest should skip batches committed by a previous run"""
+    checkpoint = str(tmp_path / "ingest.json")
+    docs = [(str(i), f"Document {i}", {"n": i}) for i in range(10)]
+
+    assert vector_search.ingest(docs[:4], batch_size=3, checkpoint=checkpoint) == 4
+    assert vector_search.ingest(docs, batch_size=3, checkpoint=checkpoint) == 6
+    assert vector_search.count() == 10
+
+
+def test_search_many_batches_queries(vector_search):
+    """Batched search should return one result list per query"""
+    vector_search.add_documents(
+        documents=["Python programming", "Machine learning", "Docker containers"],
+        ids=["1", "2", "3"],
+    )
+
+    results = vector_search.search_many(["python code", "neural networks", "python code"], top_k=1)
+
+    assert len(results["documents"]) == 3
+    assert results["ids"][0] == results["ids"][2]
+    assert list(vector_search._query_cache) == ["python code", "neural networks"]
+
+
+def test_numpy_collection_matches_brute_force(tmp_path):
+    """Exact search should return squared-L2 neighbours and honour where filters"""
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(500, 8)).astype(np.float32)
+    queries = rng.normal(size=(3, 8)).astype(np.float32)
+    ids = [str(i) for i in range(len(vectors))]
+    metadatas = [{"n": i, "parity": i % 2} for i in range(len(vectors))]
+
+    collection = NumpyCollection("test", tmp_path, block_size=64)
+    collection.add(ids=ids, embeddings=vectors, metadatas=metadatas)
+
+    distances = ((queries[:, None, :] - vectors[None]) ** 2).sum(-1)
+    expected = [[str(i) for i in row] for row in np.argsort(distances, axis=1)[:, :5]]
+    results = collection.query(queries, n_results=5)
+    assert results["ids"] == expected
+    assert np.allclose(results["distances"], np.sort(distances, axis=1)[:, :5], atol=1e-3)
+
+    where = {"$and": [{"parity": 1}, {"n": {"$lt": 100}}]}
+    filtered = collection.query(queries, n_results=5, where=where)
+    assert all(int(i) % 2 == 1 and int(i) < 100 for row in filtered["ids"] for i in row)
+
+    collection.delete(ids=expected[0][:1])
+    assert collection.count() == 499
+    assert collection.query(queries[:1], n_results=1)["ids"][0] == expected[0][1:2]
+
+
+def test_numpy_collection_persists_and_reloads(tmp_path):
+    """A reopened collection should serve the same documents and results"""
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(50, 4)).astype(np.float32)
+    ids = [str(i) for i in range(50)]
+
+    collection = NumpyCollection("test", tmp_path)
+    collection.add(ids=ids, embeddings=vectors, documents=[f"doc {i}" for i in range(50)])
+    collection.upsert(ids=["3"], embeddings=vectors[:1], documents=["moved"])
+    collection.delete(ids=["7"])
+
+    reopened = NumpyCollection("test", tmp_path)
+    assert reopened.count() == 49
+    assert reopened.get(ids=["3"])["documents"] == ["moved"]
+    assert reopened.query(vectors[:2], 3)["ids"] == collection.query(vectors[:2], 3)["ids"]
+
+
+
+def test_numpy_backend_writes_after_delete_collection_persist(tmp_path):
+    """Documents added after delete_collection() should survive a reopen"""
+    def open_search():
+        return VectorSearch("test_collection", str(tmp_path / "store"), backend="numpy")
+
+    search = open_search()
+    search.add_documents(documents=["Python programming"], ids=["1"])
+    search.delete_collection()
+    search.add_documents(documents=["Rust systems"], ids=["2"])
+
+    reopened = open_search()
+    assert reopened.count() == 1
+    assert reopened.collection.get(ids=["2"])["documents"] == ["Rust systems"]
+
+def test_numpy_collection_ivf_recall():
+    """IVF search on clustered data should find most exact neighbours"""
+    rng = np.random.default_rng(2)
+    centers = rng.normal(size=(20, 16)) * 5
+    vectors = (centers[rng.integers(0, 20, 4000)] + rng.normal(size=(4000, 16))).astype(np.float32)
+    queries = vectors[:20] + 0.1
+    ids = [str(i) for i in range(len(vectors))]
+
+    exact = NumpyCollection("exact")
+    exact.add(ids=ids, embeddings=vectors)
+    ivf = NumpyCollection("ivf", nlist=32, nprobe=8)
+    ivf.add(ids=ids, embeddings=vectors)
+
+    truth = exact.query(queries, n_results=10)["ids"]
+    found = ivf.query(queries, n_results=10)["ids"]
+    recall = np.mean([len(set(a) & set(b)) / 10 for a, b in zip(truth, found)])
+    assert recall >= 0.9
+
+
+def test_numpy_backend_search(tmp_path):
+    """VectorSearch should work the same on the NumPy backend"""
+    search = VectorSearch(
+        collection_name="test_collection",
+        persist_directory=str(tmp_path / "store"),
+        backend="numpy",
+    )
+    search.add_documents(
+        documents=["Python programming", "Machine learning"],
+        ids=["1", "2"],
+        metadatas=[{"lang": "python"}, {"lang": "none"}],
+    )
+
+    assert search.count() == 2
+    assert search.search("python code", top_k=1, where={"lang": "python"})["ids"] == [["1"]]
+
+
+def test_lexical_index_and_rank_fusion(tmp_path):
+    """BM25 index should update incrementally; fusion should reward agreement"""
+    index = LexicalIndex(tmp_path / "lexical.sqlite3")
+    index.upsert(
+        ["a", "b", "c"],
+        ["Deploy with kubectl apply", "Python packaging guide", "kubectl rollout status"],
+        [{"lang": "shell"}, {"lang": "python"}, {"lang": "shell"}],
+    )
+    index.upsert(["b"], ["Python kubectl wrapper"], [{"lang": "python"}])
+    index.delete(["c"])
+
+    assert index.count() == 2
+    assert {hit["id"] for hit in index.search("kubectl")} == {"a", "b"}
+    assert [hit["id"] for hit in index.search("kubectl", where={"lang": "python"})] == ["b"]
+    assert index.search("???") == []
+
+    fused = reciprocal_rank_fusion([["x", "y", "z"], ["y", "w"]])
+    assert fused[0][0] == "y"
+    assert {doc_id for doc_id, _ in fused} == {"x", "y", "z", "w"}
+
+
+def test_lexical_where_filters_in_sql(tmp_path):
+    """where filters should run in SQL, on columns added to older index files too"""
+    import sqlite3
+
+    db_path = tmp_path / "lexical.sqlite3"
+    old = sqlite3.connect(db_path)
+    old.executescript(
+        "CREATE TABLE documents (id INTEGER PRIMARY KEY, doc_id TEXT UNIQUE NOT NULL, "
+        "metadata TEXT NOT NULL);"
+        "CREATE VIRTUAL TABLE documents_fts USING fts5 (content, tokenize = 'porter unicode61');"
+        "INSERT INTO documents VALUES (1, 'old', '{\"system\": \"claude\", \"chunk\": 2}');"
+        "INSERT INTO documents_fts (rowid, content) VALUES (1, 'retry budget');"
+    )
+    old.commit()
+    old.close()
+
+    index = LexicalIndex(db_path)
+    index.upsert(["new"], ["retry policy"], [{"system": "openai", "filename": "a.md"}])
+
+    def ids(where):
+        return sorted(hit["id"] for hit in index.search("retry", where=where))
+
+    assert ids({"system": {"$contains": "claud"}}) == ["old"]
+    assert ids({"$or": [{"filename": "a.md"}, {"chunk": {"$gte": 2}}]}) == ["new", "old"]
+    assert ids({"filename": {"$ne": "a.md"}, "system": {"$nin": ["gemini"]}}) == ["old"]
+    assert ids({"system": {"$in": []}}) == []
+    with pytest.raises(ValueError):
+        index.search("retry", where={"system": {"$regex": "x"}})
+
+
+def test_hybrid_search_reports_both_scores(tmp_path):
+    """Hybrid search should find exact tokens and report per-retriever scores"""
+    search = VectorSearch(
+        collection_name="test_collection",
+        persist_directory=str(tmp_path / ".chromadb"),
+        lexical=True,
+    )
+    search.add_documents(
+        documents=["Python programming", "Error code XJ-4471 in billing", "Machine learning"],
+        ids=["1", "2", "3"],
+    )
+
+    results = search.search("XJ-4471", top_k=2, mode="hybrid")
+    assert results["ids"][0][0] == "2"
+    assert results["bm25_scores"][0][0] > 0
+    assert len(results["scores"][0]) == 2
+
+    plain = VectorSearch(
+        collection_name="plain_collection",
+        persist_directory=str(tmp_path / ".chromadb"),
+    )
+    with pytest.raises(ValueError):
+        plain.search("XJ-4471", mode="hybrid")
+
+
+
+@pytest.mark.parametrize("backend", ["chroma", "numpy"])
+def test_add_documents_keeps_existing_keyword_entries(tmp_path, backend):
+    """Re-adding an id should leave both stores on the original text, as add() does"""
+    search = VectorSearch(
+        "test_collection", str(tmp_path / ".chromadb"), backend=backend, lexical=True
+    )
+    search.add_documents(documents=["Original kubectl notes"], ids=["1"])
+    search.add_documents(documents=["Replacement terraform notes"], ids=["1"])
+
+    assert search.collection.get(ids=["1"])["documents"] == ["Original kubectl notes"]
+    assert [hit["id"] for hit in search.lexical.search("kubectl")] == ["1"]
+    assert search.lexical.search("terraform") == []
+
+@pytest.mark.parametrize("quantization", ["float16", "int8"])
+def test_numpy_collection_quantization_rescores_exactly(tmp_path, quantization):
+    """Quantized scans should keep exact distances and shrink resident vectors"""
+    rng = np.random.default_rng(3)
+    vectors = rng.normal(size=(2000, 32)).astype(np.float32)
+    queries = vectors[:10] + 0.01
+    ids = [str(i) for i in range(len(vectors))]
+
+    exact = NumpyCollection("exact")
+    exact.add(ids=ids, embeddings=vectors)
+    quantized = NumpyCollection("quantized", tmp_path, quantization=quantization)
+    quantized.add(ids=ids, embeddings=vectors)
+
+    expected = exact.query(queries, n_results=5)
+    results = quantized.query(queries, n_results=5)
+    assert results["ids"] == expected["ids"]
+    assert np.allclose(results["distances"], expected["distances"], atol=1e-4)
+    assert quantized.resident_bytes < 0.6 * exact.resident_bytes
+
+    reopened = NumpyCollection("quantized", tmp_path, quantization=quantization)
+    assert reopened.query(queries, n_results=5)["ids"] == expected["ids"]
+
+
+@pytest.mark.parametrize("quantization", ["float16", "int8"])
+def test_numpy_collection_quantization_across_appends(tmp_path, quantization):
+    """Quantized scans should only cover written rows after several appends and a reopen"""
+    rng = np.random.default_rng(4)
+    vectors = rng.normal(size=(1002, 16)).astype(np.float32)
+    ids = [str(i) for i in range(len(vectors))]
+    assert NumpyCollection("empty", quantization=quantization).resident_bytes == 0
+
+    for path in (None, tmp_path):
+        collection = NumpyCollection("appended", path, quantization=quantization)
+        collection.add(ids=ids[:1000], embeddings=vectors[:1000])
+        collection.add(ids=ids[1000:1001], embeddings=vectors[1000:1001])
+        assert collection.query(vectors[1000:1001], n_results=1)["ids"] == [["1000"]]
+
+    reopened = NumpyCollection("appended", tmp_path, quantization=quantization)
+    reopened.add(ids=ids[1001:], embeddings=vectors[1001:])
+    assert reopened.query(vectors[[1001, 5]], n_results=1)["ids"] == [["1001"], ["5"]]
+
+
+def test_embedder_registry_shares_lazy_models():
+    """Handles should load one model per (name, device) on first encode"""
+    loads = []
+
+    class CountingModel:
+        def __init__(self, name, device):
+            loads.append((name, device))
+
+        def encode(self, sentences, **kwargs):
+            return np.ones((len(sentences), 2), dtype=np.float32)
+
+    embedders.register_embedder("counting-model", CountingModel)
+    first = embedders.get_embedder("counting-model")
+    second = embedders.get_embedder("counting-model")
+    assert loads == [] and not first.loaded
+
+    first.encode(["a"])
+    second.encode(["b", "c"])
+    assert loads == [("counting-model", None)]
+
+    embedders.warmup("counting-model", device="cpu")
+    assert len(loads) == 2
+
+    assert embedders.unload("counting-model") == 1
+    assert not first.loaded
+    first.encode(["a"])
+    assert len(loads) == 3
+    embedders.unload()
+
+
+def test_embedding_pool_encodes_in_input_order():
+    """Pool workers should return vectors in input order via shared memory"""
+    sentences = ["a", "three word text", "bb", "a much longer sentence here", "cc c"]
+
+    with EmbeddingPool("length-model", processes=2, batch_size=2, factory=LengthModel) as pool:
+        vectors = pool.encode(sentences)
+        single = pool.encode("one two")
+
+    assert vectors.shape == (5, 3)
+    assert vectors[:, 0].tolist() == [len(s) for s in sentences]
+    assert vectors[:, 1].tolist() == [s.count(" ") for s in sentences]
+    assert single.tolist() == [7, 1, 1]
+
+
+def test_add_documents_passes_arrays_in_max_batches(vector_search):
+    """Embeddings should reach the store as float32 array slices, never lists"""
+    writes = []
+    original_add = vector_search.collection.add
+
+    def recording_add(**kwargs):
+        writes.append(kwargs["embeddings"])
+        return original_add(**kwargs)
+
+    vector_search.collection.add = recording_add
+    vector_search.max_batch_size = 2
+    vector_search.add_documents(
+        documents=["Python", "Rust", "Go", "Zig", "C"], ids=["1", "2", "3", "4", "5"]
+    )
+
+    assert [len(batch) for batch in writes] == [2, 2, 1]
+    assert all(isinstance(batch, np.ndarray) and batch.dtype == np.float32 for batch in writes)
+    assert vector_search.count() == 5
+
+
+def test_query_result_cache_invalidates_on_write(monkeypatch):
+    """Cached results should expire, be dropped by bump() and skip stale puts"""
+    clock = [0.0]
+    monkeypatch.setattr("src.vector_search.query_cache.time.monotonic", lambda: clock[0])
+    cache = QueryResultCache(max_size=2, ttl=10.0)
+
+    assert cache.get("a") is None
+    cache.put("a", {"ids": [["1"]]}, cache.generation)
+    cache.get("a")["ids"].append("mutated")
+    assert cache.get("a") == {"ids": [["1"]]}
+
+    generation = cache.generation
+    cache.bump()
+    cache.put("b", {"ids": []}, generation)
+    assert cache.get("a") is None and cache.get("b") is None
+
+    cache.put("a", 1, cache.generation)
+    clock[0] = 11.0
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.expirations, stats.invalidations) == (2, 4, 1, 1)
+    assert stats.hit_rate == pytest.approx(2 / 6)
+
+
+def test_search_results_cached_until_next_write(tmp_path):
+    """Repeated searches should hit the cache and see writes made through any instance"""
+    reader, writer = (
+        VectorSearch("test_collection", str(tmp_path / ".chromadb"), result_cache_size=16)
+        for _ in range(2)
+    )
+    reader.add_documents(documents=["Python programming"], ids=["1"])
+
+    first = reader.search("programming", top_k=5)
+    assert reader.search("programming", top_k=5) == first
+    assert reader.cache_stats().hits == 1
+
+    writer.add_documents(documents=["Programming in Rust"], ids=["2"])
+    assert len(reader.search("programming", top_k=5)["ids"][0]) == 2
+    assert reader.cache_stats().hits == 1
+
+
+def test_query_result_cache_shares_generation_per_scope():
+    """Caches on the same scope should invalidate each other, other scopes untouched"""
+    first, second, other = (
+        QueryResultCache(scope=scope) for scope in (("dir", "a"), ("dir", "a"), ("dir", "b"))
+    )
+    for cache in (first, other):
+        cache.put("q", 1, cache.generation)
+
+    second.bump()
+    assert first.get("q") is None
+    assert other.get("q") == 1
+
+
+def test_async_search_micro_batches_and_cancels(tmp_path, monkeypatch):
+    """Concurrent async searches should share one search_many call; cancelled ones are dropped"""
+    vector_search = VectorSearch(
+        "test_collection", str(tmp_path / ".chromadb"), result_cache_size=16
+    )
+    vector_search.add_documents(
+        documents=["Python programming", "Machine learning", "Rust systems"],
+        ids=["1", "2", "3"],
+    )
+    batches = []
+    search_many = vector_search.search_many
+
+    def recording_search_many(queries, *args):
+        batches.append(queries)
+        return search_many(queries, *args)
+
+    monkeypatch.setattr(vector_search, "search_many", recording_search_many)
+
+    async def run():
+        async with AsyncVectorSearch(vector_search, batch_window=0.05) as searcher:
+            tasks = [
+                asyncio.create_task(searcher.search(query, top_k=1))
+                for query in ("Python", "learning", "Rust", "cancelled")
+            ]
+            await asyncio.sleep(0)
+            tasks[-1].cancel()
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+
+            assert await searcher.search("Python", top_k=1) == results[0]
+            await searcher.add_documents(documents=["Go services"], ids=["4"])
+            return results
+
+    results = asyncio.run(run())
+
+    assert batches == [["Python", "learning", "Rust"]]
+    assert [result["ids"][0] for result in results[:3]] == [["1"], ["2"], ["3"]]
+    assert isinstance(results[3], asyncio.CancelledError)
+    assert vector_search.count() == 4